@@ -1,9 +1,14 @@
 import streamlit as st
-from streamlit_extras import add_vertical_space as avs 
+from utils.assets import asset
 
 # Page Config
 st.set_page_config(page_title="Home Page", page_icon="🏠", layout="wide")
 
+# Vertical space between sections (same as streamlit_extras' add_vertical_space, without importing the package)
+def add_vertical_space(num_lines=1):
+	for _ in range(num_lines):
+		st.write("")
+
 # Page Header
 st.title("Welcome to the HR Analytics Project Interactive Dashboard")
 
@@ -19,9 +24,12 @@ with col1:
 	- **Page 4**: An attrition prediction model developed by our team.
 	""")
 
-	avs.add_vertical_space(1) 
+	add_vertical_space(1) 
 
-	st.image("https://cdn2.fptshop.com.vn/unsafe/1920x0/filters:quality(100)/2023_10_13_638327858006688384_hr-la-gi-1.jpg", width = 400)
+	# Local banner only (no image rather than a remote fetch)
+	banner = asset("banner")
+	if banner:
+		st.image(banner, width = 400)
 
 
 with col2: 
@@ -33,7 +41,7 @@ with col2:
 	- Employee Retention
 	- Strategic Hiring""")
 
-	avs.add_vertical_space(2) 
+	add_vertical_space(2) 
 
 	st.subheader("Goals:")
 	st.markdown(""" 
@@ -51,17 +59,17 @@ with st.container(border=True):
 		st.markdown("""
 		#### **Andriani Papatheodoropoulou**  
 		**BSc Chemistry**  """)
-		st.image("./Data/andriani plus qr.jpg", width=400)
+		st.image(asset("andriani"), width=400)
 
 	with col2:
 		st.markdown("""
 		#### **Androniki Paragyiou**  
 		**BSc Economics**  """)
-		st.image("./Data/androniki plus qr.jpg", width=400)
+		st.image(asset("androniki"), width=400)
 
 	with col3:
 		st.markdown("""
 		#### **Nikolas Bourantas**  
 		**MSc Agricultural Economics and Rural Development**  """)
-		st.image("./Data/nikolas plus qr.jpg", width=400)
+		st.image(asset("nikolas"), width=400)
 
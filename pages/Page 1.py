@@ -1,50 +1,45 @@
 # Import necessary libraries
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
+from utils.data import load_backend
+from utils.export import export_section
 
 # Page Config
 st.set_page_config(page_title="Page 1", page_icon="https://static-00.iconduck.com/assets.00/demographic-icon-2048x1908-4opu48c0.png", layout="wide")
 
 # Data Importing and Proccessing----------------------------------------------------------------------------------------
-df1 = pd.read_csv("./Data/Employee.csv")
-df2 = pd.read_csv("./Data/PerformanceRating.csv")
-
-# Merge the 2 datasets.
-df = df1.merge(df2, how="inner", on="EmployeeID")
+# Merged Employee and PerformanceRating datasets behind a query backend (pandas or DuckDB, see utils/backends.py).
+# All the numbers below are computed by the backend.
+with st.sidebar:
+	st.title("**Workforce Demographics**")
 
-# Data Transformation
-# Convert Hire Date and Review Date to datetime
-df["HireDate"] = pd.to_datetime(df["HireDate"])
-df["ReviewDate"] = pd.to_datetime(df["ReviewDate"])
+backend = load_backend()
 
 # Filters ----------------------------------------------------------------------------------------------------
 
 # Set up filters
 with st.sidebar:
-	st.title("**Workforce Demographics**")
-	st.title("Dashboard Filters ⚙️ ")	
+	st.title("Dashboard Filters ⚙️ ")
 
 	# Slicer: Select a department
-	selected_department = st.multiselect("Select Department", df["Department"].unique())
+	selected_department = st.multiselect("Select Department", backend.values("Department"))
 
 	# Slicer: Select gender
-	selected_gender = st.multiselect("Select Gender", df["Gender"].unique())
+	selected_gender = st.multiselect("Select Gender", backend.values("Gender"))
 
 	# Slicer: Select employee status
 	selected_status = st.multiselect("Select Employee Status ", ["Active", "Inactive"])
 
 # Filter logic implementation
+filters = []
+
 # Filters for department
 if selected_department:
-	filtered_df = df[ df["Department"].isin(selected_department) ]
-else:
-	filtered_df = df
+	filters.append(("Department", "in", selected_department))
 
 # Filters for gender
 if selected_gender:
-	filtered_df = filtered_df[ filtered_df["Gender"].isin(selected_gender) ]
+	filters.append(("Gender", "in", selected_gender))
 
 # Filters for employee status:
 if selected_status:
@@ -54,24 +49,23 @@ if selected_status:
         selected_status = ["Yes"]
     else:
         selected_status = ["Yes", "No"]
-    filtered_df = filtered_df[filtered_df["Attrition"].isin(selected_status)]
+    filters.append(("Attrition", "in", selected_status))
 
 # Metrics -------------------------------------------------------------------------------------------------
 
-# Total employees 
-all_employees = filtered_df["EmployeeID"].nunique()
+# Total employees
+all_employees = backend.headcount(filters=filters)
 
 # Attrition Rate
-# Inactive Employees (Not working in the company now)
-inactive_df = filtered_df[ filtered_df["Attrition"]=="Yes" ]      # subset of dataset for Attrition=Yes
-inactive = inactive_df["EmployeeID"].nunique()   # unique employee IDs in subset = inactive employees
+# Inactive Employees (Not working in the company now): unique employee IDs with Attrition=Yes
+inactive = backend.headcount(filters=filters + [("Attrition", "==", "Yes")])
 
 # Calculate the attrition rate: inactive / all_employees
 attrition_rate = 100 * inactive / all_employees
 
 # Average salary (company-wide)
-average_employee_salary = filtered_df.groupby('EmployeeID')['Salary'].mean()
-average_salary = average_employee_salary.mean()
+average_employee_salary = backend.employee_mean("Salary", filters)
+average_salary = average_employee_salary["Salary"].mean()
 
 # Set up columns
 col1, col2, col3 = st.columns(3)
@@ -87,8 +81,6 @@ with col2:
 
 with col3:
 	# Average salary
-	average_employee_salary = filtered_df.groupby('EmployeeID')['Salary'].mean()
-	average_salary = average_employee_salary.mean()
 	with st.container(border=True):
 		st.metric(label="Average Salary", value = f"{average_salary:,.0f} $")
 
@@ -102,27 +94,23 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
 	# Gender distribution pie chart
-	gender_company = filtered_df.groupby("Gender")["EmployeeID"].nunique().reset_index(name="Count")
+	gender_company = backend.headcount("Gender", filters)
 	fig = px.pie(gender_company, names="Gender", values="Count", title="Employee Distribution by Gender", color_discrete_sequence=neutrals)
 	st.plotly_chart(fig)
 
 with col2:
-	# Employee Distribution by Tenure 
-	# Define tenure ranges
-	bins = [0, 2, 5, 10, float("inf")]
-	labels = ["0-2 years", "3-5 years", "6-10 years", "11-15 years" ]
-	filtered_df["TenureGroup"] = pd.cut(filtered_df["YearsAtCompany"], bins=bins, labels=labels, right=False)
-	# Calculate total employees in each tenure group
-	tenure_distr = filtered_df.groupby("TenureGroup", observed=True)["EmployeeID"].nunique().reset_index(name="Number of Employees")
+	# Employee Distribution by Tenure
+	# Calculate total employees in each tenure group (0-2, 3-5, 6-10, 11-15 years)
+	tenure_distr = backend.headcount("TenureGroup", filters).rename(columns={"Count": "Number of Employees"})
 	# Create a stacked bar chart
-	fig = px.bar(tenure_distr, x="TenureGroup", y="Number of Employees", 
+	fig = px.bar(tenure_distr, x="TenureGroup", y="Number of Employees",
                             title="Employee Distribution by Tenure",
                             color_discrete_sequence=neutrals[1:])
 	st.plotly_chart(fig)
 
 with col3:
 	# Marital status breakdown pie chart.
-	status_company = filtered_df.groupby("MaritalStatus")["EmployeeID"].nunique().reset_index(name="Count")
+	status_company = backend.headcount("MaritalStatus", filters)
 	fig = px.pie(status_company, names="MaritalStatus", values="Count", title="Employee Distribution by Marital Status", color_discrete_sequence=neutrals)
 	st.plotly_chart(fig)
 
@@ -132,14 +120,20 @@ col1, col2 = st.columns(2)
 
 with col1:
 	# Salary distribution histogram
-	average_employee_salary = filtered_df.groupby('EmployeeID')['Salary'].mean()
-	salary_df = average_employee_salary.reset_index()
+	salary_df = average_employee_salary
 	fig = px.histogram(salary_df, x="Salary", title="Employee Distribution by Salary", histnorm="percent", nbins=100, marginal="box", color_discrete_sequence=neutrals[1:2])
 	fig.update_layout(bargap=0.1, yaxis_title="Percentage (%)")
 	st.plotly_chart(fig)
 
 with col2:
 	# Age distribution bar chart
-	age_company = filtered_df.groupby("Age")["EmployeeID"].nunique().reset_index(name="Count")
+	age_company = backend.headcount("Age", filters)
 	fig = px.bar(age_company, "Age", "Count", title="Employee Distribution by Age", color_discrete_sequence=neutrals[1:2])
-	st.plotly_chart(fig)
\ No newline at end of file
+	st.plotly_chart(fig)
+
+# Export ----------------------------------------------------------------------------------------------
+
+# Download the rows behind the charts (filtered employee data)
+# The rows are only read from the backend (selected columns only, chunk by chunk) when the export is prepared
+export_section(lambda columns: backend.iter_rows(filters, columns), "Filtered Employee Data", "workforce_demographics",
+               key="page1_export", columns=backend.columns)
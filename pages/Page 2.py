@@ -3,6 +3,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+from utils.data import load_backend, load_threshold_grid
+from utils.thresholds import RATING_MAX, RATING_MIN, RATING_STEP, policy_filters
+from utils.backends import AVERAGE_RATING, BINS
+from utils.validation import EMPLOYEE_COLUMNS
+from utils.export import export_section
+from utils.charts import render_charts, timings_section
 
 # Page Config
 st.set_page_config(page_title="Page 2", page_icon="💼", layout="wide")
@@ -12,42 +18,59 @@ with st.sidebar:
 	st.title("**Promotions & Lay-offs**")
 
 # Data Importing and Proccessing----------------------------------------------------------------------------------------
-df1 = pd.read_csv("./Data/Employee.csv")
-df2 = pd.read_csv("./Data/PerformanceRating.csv")
+# Merged Employee and PerformanceRating datasets behind a query backend (pandas or DuckDB, see utils/backends.py).
+# The promotion and retrenchment counts come from a grid precomputed once for every threshold pair
+# (utils/thresholds.py), so moving a slider does not filter the rows again.
+backend = load_backend()
+grid = load_threshold_grid(backend)
 
-# Merge the 2 datasets.
-df = df1.merge(df2, how="inner", on="EmployeeID")
+# Policy thresholds (defaults: the original policy)
+with st.sidebar:
+	st.title("Policy Thresholds ⚙️")
+
+	st.subheader("To Be Promoted")
+	promotion_years = st.slider("Years since last promotion (at least)", 0, max(grid.max_years, 8), 8, key="promotion_years")
+	promotion_rating = st.slider("Average manager rating (at least)", RATING_MIN, RATING_MAX, 3.5, RATING_STEP, key="promotion_rating")
 
-# Data Transformation
-# Convert Hire Date and Review Date to datetime
-df["HireDate"] = pd.to_datetime(df["HireDate"])
-df["ReviewDate"] = pd.to_datetime(df["ReviewDate"])
+	st.subheader("To Be Retrenched")
+	retrenchment_years = st.slider("Years since last promotion (at least)", 0, max(grid.max_years, 4), 4, key="retrenchment_years")
+	retrenchment_rating = st.slider("Average manager rating (below)", RATING_MIN, RATING_MAX, 3.0, RATING_STEP, key="retrenchment_rating")
 
 # Metrics ---------------------------------------------------------------------------------------------------------------
 # Retrencment and Promotion Rate
-# Calculate the average ManagerRating for each EmployeeID 
-df['AverageManagerRating'] = df.groupby('EmployeeID')['ManagerRating'].transform('mean')
-
-# Find those who have >=8 years since their last promotion, manager rating 4 and above and are still in the company.
-eligible_employees = df[ (df["YearsSinceLastPromotion"]>= 8) & (df["AverageManagerRating"]>=3.5) & (df["Attrition"]=="No") ]["EmployeeID"].unique()
-# Create a new ToBePromoted column that marks those employs with Yes and everyone else with No.
-df["ToBePromoted"] = df['EmployeeID'].apply(lambda x: 'Yes' if x in eligible_employees else 'No')
+# The AverageManagerRating column is the average ManagerRating of each EmployeeID (computed by the backend).
 
-# Find those who have >=4 years since their last promotion, manager rating below 3 and are still in the company.
-retrenched = df[  (df["YearsSinceLastPromotion"]>=4) & (df["AverageManagerRating"]<3) & (df["Attrition"]=="No") ]["EmployeeID"].unique()
+# ToBePromoted: years since their last promotion, average manager rating at least the thresholds and still in the company.
+to_be_promoted = policy_filters(promotion_years, ">=", promotion_rating)
 
-# Create a new ToBeRetrenched column that marks those employs with Yes and everyone else with No.
-df["ToBeRetrenched"] = df['EmployeeID'].apply(lambda x: 'Yes' if x in retrenched else 'No')
+# ToBeRetrenched: years since their last promotion at least the threshold, average manager rating below the threshold
+# and still in the company.
+to_be_retrenched = policy_filters(retrenchment_years, "<", retrenchment_rating)
 
 # Active Employees (Still working in the company)
-active_df = df[ df["Attrition"]=="No" ]      # subset of dataset for Attrition=No
-active = active_df["EmployeeID"].nunique()
+active = grid.active
 
 # Calculate the promotion rate: ToBePromoted / all active employees
-promotion_rate = 100 * active_df[ active_df["ToBePromoted"]=="Yes" ]["EmployeeID"].nunique() / active
+promotion_rate = 100 * grid.headcount(filters=to_be_promoted) / active
 
 # Calculate the retrenchment rate: ToBeRetrenched / all active employees
-retrenchment_rate = 100 * active_df[ active_df["ToBeRetrenched"]=="Yes" ]["EmployeeID"].nunique() / active
+retrenchment_rate = 100 * grid.headcount(filters=to_be_retrenched) / active
+
+# Employees per group with the flag Yes (in the flagged subset) or No (everyone else in the group).
+# A flag is the same for all the rows of an employee, so No = all employees of the group - flagged employees.
+def flag_counts(by, flag_filters, observed=True):
+	counts = grid.total(by).rename(columns={"Count": "Total"})
+	if not observed:
+		# Keep the empty groups of a bin column (e.g. a tenure group without employees)
+		counts = counts.set_index(by).reindex(pd.Categorical(BINS[by][2], categories=BINS[by][2], ordered=True), fill_value=0).rename_axis(by).reset_index()
+	counts = counts.merge(grid.headcount(by, flag_filters), on=by, how="left").fillna({"Count": 0})
+	flag_data = pd.concat([
+		counts[[by]].assign(StatusFlag="No", Count=(counts["Total"] - counts["Count"]).astype(int)),
+		counts[[by]].assign(StatusFlag="Yes", Count=counts["Count"].astype(int)),
+	])
+	if observed:
+		flag_data = flag_data[ flag_data["Count"] > 0 ]
+	return flag_data.sort_values([by, "StatusFlag"]).reset_index(drop=True)
 
 # Set up columns
 col1, col2, col3, col4 = st.columns(4)
@@ -69,209 +92,191 @@ with col4:
 # Color pallette for graphs
 neutrals=["#EDE6DB", "#C2A68C", "#5A3E36", "#2E8B57", "#556B2F"]
 
-# 1: Employee Distribution by Role: Layoffs and Promotions
-# Calculate total employees per role
-total_employees = df.groupby("JobRole")["EmployeeID"].nunique().reset_index(name="Total")
+# Every chart is a function that runs its queries and returns the figure.
+# The charts are computed on a thread pool and shown in their placeholders as they complete (utils/charts.py).
 
-# Group by role for layoff and promotion data
-layoff_data = df.groupby(["JobRole", "ToBeRetrenched"])["EmployeeID"].nunique().reset_index(name="Count")
-promotion_data = df.groupby(["JobRole", "ToBePromoted"])["EmployeeID"].nunique().reset_index(name="Count")
+# 1: Employee Distribution by Role: Layoffs and Promotions
+def role_chart():
+	# Calculate total employees per role
+	total_employees = grid.total("JobRole").rename(columns={"Count": "Total"})
 
-# Sort total employees in descending order
-total_employees = total_employees.sort_values(by="Total", ascending=False)
+	# Group by role for layoff and promotion data
+	layoff_data = flag_counts("JobRole", to_be_retrenched)
+	promotion_data = flag_counts("JobRole", to_be_promoted)
 
-# Store sorted order of JobRoles
-sorted_roles = total_employees["JobRole"].tolist()
+	# Sort total employees in descending order
+	total_employees = total_employees.sort_values(by="Total", ascending=False)
 
-# Add a column to distinguish between layoff and promotion
-layoff_data["Status"] = "Layoff"
-promotion_data["Status"] = "Promotion"
+	# Store sorted order of JobRoles
+	sorted_roles = total_employees["JobRole"].tolist()
 
-# Rename columns for consistency
-layoff_data.rename(columns={"ToBeRetrenched": "StatusFlag"}, inplace=True)
-promotion_data.rename(columns={"ToBePromoted": "StatusFlag"}, inplace=True)
+	# Add a column to distinguish between layoff and promotion
+	layoff_data["Status"] = "Layoff"
+	promotion_data["Status"] = "Promotion"
 
-# Combine both datasets
-combined_data = pd.concat([layoff_data, promotion_data])
+	# Combine both datasets
+	combined_data = pd.concat([layoff_data, promotion_data])
 
-# Merge with total employees to calculate percentages
-combined_data = combined_data.merge(total_employees, on="JobRole")
-combined_data["Role Percentage"] = (combined_data["Count"] / combined_data["Total"]) * 100
+	# Merge with total employees to calculate percentages
+	combined_data = combined_data.merge(total_employees, on="JobRole")
+	combined_data["Role Percentage"] = (combined_data["Count"] / combined_data["Total"]) * 100
 
-# Stacked bar chart 
-fig = px.bar(combined_data, x="JobRole", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
+	# Stacked bar chart 
+	fig = px.bar(combined_data, x="JobRole", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
                 title="Employee Distribution by Role: Layoffs and Promotions",
                 labels={"JobRole": "Role", "Count": "Number of Employees", "StatusFlag": "Status Flag"},
                 text="Count", hover_data={"Role Percentage": ":.2f", "Total": True},
                 color_discrete_sequence=neutrals[1:])
 
-# Manually set category order based on sorted roles
-fig.update_xaxes(categoryorder="array", categoryarray=sorted_roles)
+	# Manually set category order based on sorted roles
+	fig.update_xaxes(categoryorder="array", categoryarray=sorted_roles)
 
-# Set a y-axis range to make sure all bars are visible
-max_count = combined_data["Count"].max()
-fig.update_yaxes(range=[0, max_count * 1.3])
-
-# Display chart
-st.plotly_chart (fig)
+	# Set a y-axis range to make sure all bars are visible
+	max_count = combined_data["Count"].max()
+	fig.update_yaxes(range=[0, max_count * 1.3])
+	return fig
 
 
 # 2: Employee Distribution by Department: Layoffs and Promotions
-# Calculate total employees per department
-total_employees_dept = df.groupby("Department")["EmployeeID"].nunique().reset_index(name="Total")
-
-# Group promotion and layoff data by department
-layoff_data_dept = df.groupby(["Department", "ToBeRetrenched"])["EmployeeID"].nunique().reset_index(name="Count")
-promotion_data_dept = df.groupby(["Department", "ToBePromoted"])["EmployeeID"].nunique().reset_index(name="Count")
+def department_chart():
+	# Calculate total employees per department
+	total_employees_dept = grid.total("Department").rename(columns={"Count": "Total"})
 
-# Add a column to distinguish between layoff and promotion
-layoff_data_dept["Status"] = "Layoff"
-promotion_data_dept["Status"] = "Promotion"
+	# Group promotion and layoff data by department
+	layoff_data_dept = flag_counts("Department", to_be_retrenched)
+	promotion_data_dept = flag_counts("Department", to_be_promoted)
 
-# Rename columns for consistency
-layoff_data_dept.rename(columns={"ToBeRetrenched": "StatusFlag"}, inplace=True)
-promotion_data_dept.rename(columns={"ToBePromoted": "StatusFlag"}, inplace=True)
+	# Add a column to distinguish between layoff and promotion
+	layoff_data_dept["Status"] = "Layoff"
+	promotion_data_dept["Status"] = "Promotion"
 
-# Combine both datasets
-combined_data_dept = pd.concat([layoff_data_dept, promotion_data_dept])
+	# Combine both datasets
+	combined_data_dept = pd.concat([layoff_data_dept, promotion_data_dept])
 
-# Merge with total employees to calculate percentages
-combined_data_dept = combined_data_dept.merge(total_employees_dept, on="Department")
-combined_data_dept["Department Percentage"] = (combined_data_dept["Count"] / combined_data_dept["Total"]) * 100
+	# Merge with total employees to calculate percentages
+	combined_data_dept = combined_data_dept.merge(total_employees_dept, on="Department")
+	combined_data_dept["Department Percentage"] = (combined_data_dept["Count"] / combined_data_dept["Total"]) * 100
 
-# Stacked bar chart
-fig = px.bar(combined_data_dept, x="Department", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
+	# Stacked bar chart
+	fig = px.bar(combined_data_dept, x="Department", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
             title="Employee Distribution by Department: Layoffs and Promotions",
             labels={"Department": "Department", "Count": "Number of Employees", "StatusFlag": "Status Flag"},
             text="Count", hover_data={"Department Percentage": ":.2f", "Total": True},
             color_discrete_sequence=neutrals[1:])
 
-# Set a y-axis range to make sure all bars are visible
-max_count = combined_data_dept["Count"].max()
-fig.update_yaxes(range=[0, max_count * 1.3])
-
-# Show graph
-st.plotly_chart(fig)
+	# Set a y-axis range to make sure all bars are visible
+	max_count = combined_data_dept["Count"].max()
+	fig.update_yaxes(range=[0, max_count * 1.3])
+	return fig
 
 # 3: Employee Distribution by Age Bracket: Layoffs and Promotions
-# Group employees into age brackets
-bins = [18, 25, 35, 45, 55, 65]  # Define age brackets
-labels = ["18-25", "26-35", "36-45", "46-55", "56-65"]
-df["AgeBracket"] = pd.cut(df["Age"], bins=bins, labels=labels, right=False)
-
-# Calculate total employees in each age bracket
-total_by_age = df.groupby("AgeBracket", observed=True)["EmployeeID"].nunique().reset_index(name="Total")
-
-# Layoffs data for pie chart
-layoff_age = df[df["ToBeRetrenched"] == "Yes"].groupby("AgeBracket", observed=True)["EmployeeID"].nunique().reset_index(name="Count")
-layoff_age = layoff_age.merge(total_by_age, on="AgeBracket")
-layoff_age["Age Bracket Percentage"] = (layoff_age["Count"] / layoff_age["Total"]) * 100
-
-# Promotions data for pie chart
-promotion_age = df[df["ToBePromoted"] == "Yes"].groupby("AgeBracket", observed=True)["EmployeeID"].nunique().reset_index(name="Count")
-promotion_age = promotion_age.merge(total_by_age, on="AgeBracket")
-promotion_age["Age Bracket Percentage"] = (promotion_age["Count"] / promotion_age["Total"]) * 100
-
-# Layoff pie chart
-fig_layoffs = px.pie(layoff_age, values="Count", names="AgeBracket",
-                    title="Employee Distribution by Age Bracket: Layoffs",
-                    labels={"AgeBracket": "Age Bracket", "Count": "Number of Layoffs"},
+# Age brackets: 18-25, 26-35, 36-45, 46-55, 56-65
+def age_chart(flag_filters, title, count_label):
+	# Calculate total employees in each age bracket
+	total_by_age = grid.total("AgeBracket").rename(columns={"Count": "Total"})
+
+	# Layoffs or promotions data for pie chart
+	age_data = grid.headcount("AgeBracket", flag_filters)
+	age_data = age_data.merge(total_by_age, on="AgeBracket")
+	age_data["Age Bracket Percentage"] = (age_data["Count"] / age_data["Total"]) * 100
+
+	# Pie chart
+	return px.pie(age_data, values="Count", names="AgeBracket",
+                    title=title,
+                    labels={"AgeBracket": "Age Bracket", "Count": count_label},
                     hover_data = {"Age Bracket Percentage": ":.2f"},
                     color_discrete_sequence=neutrals)
 
-
-# Promotion pie chart
-fig_promotions = px.pie(promotion_age, values="Count", names="AgeBracket",
-                        title="Employee Distribution by Age Bracket: Promotions",
-                        labels={"AgeBracket": "Age Bracket", "Count": "Number of Promotions"},
-                        hover_data = {"Age Bracket Percentage": ":.2f"},
-                        color_discrete_sequence=neutrals)
-
-# Display the pie charts
-col1, col2 = st.columns(2)
-with col1:
-	st.plotly_chart(fig_layoffs)
-with col2:
-	st.plotly_chart(fig_promotions)
-
-
 # 4: Employee Distribution by Gender: Layoffs and Promotions
-# Gender Distribution for Layoffs
-layoff_gender = df[df["ToBeRetrenched"] == "Yes"].groupby("Gender")["EmployeeID"].nunique().reset_index(name="Count")
-total_by_gender = df.groupby("Gender")["EmployeeID"].nunique().reset_index(name="Total")
-layoff_gender = layoff_gender.merge(total_by_gender, on="Gender")
-layoff_gender["Gender Percentage"] = (layoff_gender["Count"] / layoff_gender["Total"]) * 100
-
-# Gender Distribution for Promotions
-promotion_gender = df[df["ToBePromoted"] == "Yes"].groupby("Gender")["EmployeeID"].nunique().reset_index(name="Count")
-promotion_gender = promotion_gender.merge(total_by_gender, on="Gender")
-promotion_gender["Gender Percentage"] = (promotion_gender["Count"] / promotion_gender["Total"]) * 100
-
-# Layoff Pie Chart
-fig_layoff_gender = px.pie(layoff_gender, values="Count", names="Gender",
-                            title="Employee Distribution by Gender: Layoffs",
+def gender_chart(flag_filters, title, count_label):
+	# Gender Distribution for Layoffs or Promotions
+	gender_data = grid.headcount("Gender", flag_filters)
+	total_by_gender = grid.total("Gender").rename(columns={"Count": "Total"})
+	gender_data = gender_data.merge(total_by_gender, on="Gender")
+	gender_data["Gender Percentage"] = (gender_data["Count"] / gender_data["Total"]) * 100
+
+	# Pie Chart
+	return px.pie(gender_data, values="Count", names="Gender",
+                            title=title,
                             hover_data={"Gender Percentage": ":.2f"},
-                            labels={"Gender": "Gender", "Count": "Number of Layoffs"},
+                            labels={"Gender": "Gender", "Count": count_label},
                             color_discrete_sequence=neutrals)
 
-# Promotion Pie Chart
-fig_promotion_gender = px.pie(promotion_gender,values="Count",names="Gender",
-                            title="Employee Distribution by Gender: Promotions",
-                            hover_data={"Gender Percentage": ":.2f"},
-                            labels={"Gender": "Gender", "Count": "Number of Promotions"},
-                            color_discrete_sequence=neutrals)
-
-# Display Pie Charts
-with col1:
-	st.plotly_chart(fig_layoff_gender)
-with col2:
-	st.plotly_chart(fig_promotion_gender)
-
-
 # 5: Employee Distribution by Tenure Group: Layoffs and Promotions
-# Define tenure ranges
-bins = [0, 2, 5, 10, float("inf")]
-labels = ["0-2 years", "3-5 years", "6-10 years", "11-15 years" ]
-df["TenureGroup"] = pd.cut(df["YearsAtCompany"], bins=bins, labels=labels, right=False)
-
-# Group data by tenure group
-layoff_data = df.groupby(["TenureGroup", "ToBeRetrenched"], observed=False)["EmployeeID"].nunique().reset_index(name="Count")
-promotion_data = df.groupby(["TenureGroup", "ToBePromoted"], observed=False)["EmployeeID"].nunique().reset_index(name="Count")
-
-# Add a column to distinguish between Layoffs and Promotions
-layoff_data["Status"] = "Layoff"
-promotion_data["Status"] = "Promotion"
+# Tenure ranges: 0-2, 3-5, 6-10, 11-15 years
+def tenure_chart():
+	# Group data by tenure group
+	layoff_data = flag_counts("TenureGroup", to_be_retrenched, observed=False)
+	promotion_data = flag_counts("TenureGroup", to_be_promoted, observed=False)
 
-# Rename columns for consistency
-layoff_data.rename(columns={"ToBeRetrenched": "StatusFlag"}, inplace=True)
-promotion_data.rename(columns={"ToBePromoted": "StatusFlag"}, inplace=True)
+	# Add a column to distinguish between Layoffs and Promotions
+	layoff_data["Status"] = "Layoff"
+	promotion_data["Status"] = "Promotion"
 
-# Combine both datasets
-combined_tenure_data = pd.concat([layoff_data, promotion_data])
+	# Combine both datasets
+	combined_tenure_data = pd.concat([layoff_data, promotion_data])
 
-# Calculate total employees in each tenure group
-total_by_tenure = df.groupby("TenureGroup", observed=False)["EmployeeID"].nunique().reset_index(name="Total Employees")
-combined_tenure_data = combined_tenure_data.merge(total_by_tenure, on="TenureGroup")
+	# Calculate total employees in each tenure group
+	total_by_tenure = grid.total("TenureGroup").rename(columns={"Count": "Total Employees"})
+	combined_tenure_data = combined_tenure_data.merge(total_by_tenure, on="TenureGroup", how="left").fillna({"Total Employees": 0})
 
-# Calculate the bracket percentage
-combined_tenure_data["Bracket Percentage"] = (combined_tenure_data["Count"] / combined_tenure_data["Total Employees"]) * 100
+	# Calculate the bracket percentage
+	combined_tenure_data["Bracket Percentage"] = (combined_tenure_data["Count"] / combined_tenure_data["Total Employees"]) * 100
 
-# Create a stacked bar chart
-fig_tenure_stack = px.bar(combined_tenure_data, x="TenureGroup", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
+	# Create a stacked bar chart
+	fig_tenure_stack = px.bar(combined_tenure_data, x="TenureGroup", y="Count", color="StatusFlag", facet_col="Status", barmode="stack",
                             title="Employee Distribution by Tenure Group: Layoffs and Promotions",
                             labels={"TenureGroup": "Tenure Group", "Count": "Number of Employees", "StatusFlag": "Flag"},
                             hover_data={"Bracket Percentage": ":.2f", "Total Employees": True},
                             color_discrete_sequence=neutrals[1:])
 
+	# Layout adjustments for better visuals
+	fig_tenure_stack.update_layout(
+        xaxis_title="Tenure Group",
+        yaxis_title="Number of Employees",
+        legend_title="Flag",
+        margin=dict(t=80, b=40, l=40, r=40),  # Adjust margins for better spacing
+        title=dict(x=0.5)  # Center the title
+	)
+	return fig_tenure_stack
+
+# Placeholders in layout order: role and department charts, age and gender pie charts side by side, tenure chart
+charts = [
+	("Role: Layoffs and Promotions", st.empty(), role_chart),
+	("Department: Layoffs and Promotions", st.empty(), department_chart),
+]
+
+col1, col2 = st.columns(2)
+with col1:
+	charts.append(("Age Bracket: Layoffs", st.empty(),
+                lambda: age_chart(to_be_retrenched, "Employee Distribution by Age Bracket: Layoffs", "Number of Layoffs")))
+with col2:
+	charts.append(("Age Bracket: Promotions", st.empty(),
+                lambda: age_chart(to_be_promoted, "Employee Distribution by Age Bracket: Promotions", "Number of Promotions")))
+with col1:
+	charts.append(("Gender: Layoffs", st.empty(),
+                lambda: gender_chart(to_be_retrenched, "Employee Distribution by Gender: Layoffs", "Number of Layoffs")))
+with col2:
+	charts.append(("Gender: Promotions", st.empty(),
+                lambda: gender_chart(to_be_promoted, "Employee Distribution by Gender: Promotions", "Number of Promotions")))
+
+charts.append(("Tenure Group: Layoffs and Promotions", st.empty(), tenure_chart))
+
+timings = render_charts(charts)
+
+# Export ----------------------------------------------------------------------------------------------------------------
 
-# Layout adjustments for better visuals
-fig_tenure_stack.update_layout(
-    xaxis_title="Tenure Group",
-    yaxis_title="Number of Employees",
-    legend_title="Flag",
-    margin=dict(t=80, b=40, l=40, r=40),  # Adjust margins for better spacing
-    title=dict(x=0.5)  # Center the title
-)
+# Employee-level lists (one row per employee) for the promotion and retrenchment candidates.
+# The rows are only read from the backend (selected columns only, chunk by chunk) when the export is prepared.
+employee_columns = EMPLOYEE_COLUMNS + [AVERAGE_RATING]
+
+col1, col2 = st.columns(2)
+with col1:
+	export_section(lambda columns: (chunk[columns] for chunk in backend.iter_rows(to_be_retrenched, ["EmployeeID"] + columns, distinct=True)),
+                "To Be Retrenched", "to_be_retrenched", key="page2_export_retrenched", columns=employee_columns)
+with col2:
+	export_section(lambda columns: (chunk[columns] for chunk in backend.iter_rows(to_be_promoted, ["EmployeeID"] + columns, distinct=True)),
+                "To Be Promoted", "to_be_promoted", key="page2_export_promoted", columns=employee_columns)
 
-# Display the chart
-st.plotly_chart(fig_tenure_stack)
\ No newline at end of file
+# Per-chart timings
+timings_section(timings)
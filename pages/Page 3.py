@@ -1,82 +1,77 @@
 # Import necessary libraries
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
+from utils.data import load_backend
+from utils.export import export_section
+from utils.charts import render_charts, timings_section
 
 # Page Config
 st.set_page_config(page_title="Page 3", page_icon="📈", layout="wide")
 
 # Data Importing and Proccessing----------------------------------------------------------------------------------------
-df1 = pd.read_csv("./Data/Employee.csv")
-df2 = pd.read_csv("./Data/PerformanceRating.csv")
-
-# Merge the 2 datasets.
-df = df1.merge(df2, how="inner", on="EmployeeID")
+# Merged Employee and PerformanceRating datasets behind a query backend (pandas or DuckDB, see utils/backends.py).
+# All the numbers below are computed by the backend.
+with st.sidebar:
+	st.title("**Attrition Analysis**")
 
-# Data Transformation
-# Convert Hire Date and Review Date to datetime
-df["HireDate"] = pd.to_datetime(df["HireDate"])
-df["ReviewDate"] = pd.to_datetime(df["ReviewDate"])
+backend = load_backend()
 
 # Filters ----------------------------------------------------------------------------------------------------
 
 # Set up filters
 with st.sidebar:
-	st.title("**Attrition Analysis**")
 	st.title("Dashboard Filters ⚙️ ")
 
 	# Slicer: Select a department
-	selected_department = st.multiselect("Select Department", df["Department"].unique())
+	selected_department = st.multiselect("Select Department", backend.values("Department"))
 
 	# Slicer: Select gender
-	selected_gender = st.multiselect("Select Gender", df["Gender"].unique())
+	selected_gender = st.multiselect("Select Gender", backend.values("Gender"))
 
 	# Slicer: Select employee status
-	selected_location = st.multiselect("Select Location ", df["State"].unique())
+	selected_location = st.multiselect("Select Location ", backend.values("State"))
 
 
 # Filter logic implementation
+filters = []
+
 # Filters for department
 if selected_department:
-	filtered_df = df[ df["Department"].isin(selected_department) ]
-else:
-	filtered_df = df
+	filters.append(("Department", "in", selected_department))
 
 # Filters for gender
 if selected_gender:
-	filtered_df = filtered_df[ filtered_df["Gender"].isin(selected_gender) ]
+	filters.append(("Gender", "in", selected_gender))
 
 # Filters for employee status:
 if selected_location:
-	filtered_df = filtered_df[ filtered_df["State"].isin(selected_location) ]
+	filters.append(("State", "in", selected_location))
 
 
 # Metrics -------------------------------------------------------------------------------------------------
 
 # Attrition Rate
 # Total employees 
-all_employees = filtered_df["EmployeeID"].nunique()
-all_female = filtered_df[filtered_df["Gender"]=="Female" ]["EmployeeID"].nunique()
-all_male = filtered_df[filtered_df["Gender"]=="Male" ]["EmployeeID"].nunique()
+all_employees = backend.headcount(filters=filters)
+all_female = backend.headcount(filters=filters + [("Gender", "==", "Female")])
+all_male = backend.headcount(filters=filters + [("Gender", "==", "Male")])
 
 # Inactive Employees (Not working in the company now)
-inactive_df = filtered_df[ df["Attrition"]=="Yes" ].copy()      # subset of dataset for Attrition=Yes
-inactive = inactive_df["EmployeeID"].nunique()   # unique employee IDs in subset = inactive employees
+inactive_filters = filters + [("Attrition", "==", "Yes")]      # subset of dataset for Attrition=Yes
+inactive = backend.headcount(filters=inactive_filters)   # unique employee IDs in subset = inactive employees
 
 # Calculate the attrition rate: inactive / all_employees
 attrition_rate = 100 * inactive / all_employees
 
 # Calculate percentage of attrition in women 
-inactive_women = inactive_df[ inactive_df["Gender"]=="Female"]["EmployeeID"].nunique()
+inactive_women = backend.headcount(filters=inactive_filters + [("Gender", "==", "Female")])
 try:
 	attrition_women = 100 * inactive_women / all_female
 except ZeroDivisionError:
 	attrition_women = 0
 
 # Calculate percentage of attrition in men
-inactive_men = inactive_df[ inactive_df["Gender"]=="Male"]["EmployeeID"].nunique()
+inactive_men = backend.headcount(filters=inactive_filters + [("Gender", "==", "Male")])
 try:
     attrition_men = 100 * inactive_men / all_male
 except ZeroDivisionError:
@@ -101,40 +96,32 @@ with col3:
 # Color pallette for graphs
 neutrals=["#EDE6DB", "#C2A68C", "#5A3E36", "#2E8B57", "#556B2F"]
 
-# Set up columns for visuals
-col1, col2, col3 = st.columns(3)
+# Every chart is a function that runs its query and returns the figure.
+# The charts are computed on a thread pool and shown in their placeholders as they complete (utils/charts.py).
 
-with col1:
-	# Attrition by Tenure
-	tenure_attrition = inactive_df.groupby("YearsAtCompany")["EmployeeID"].nunique().reset_index(name="Count")
-	fig = px.bar(tenure_attrition, y="YearsAtCompany", x="Count", title="Attrition by Tenure", orientation="h", color_discrete_sequence=neutrals[0:])
-	st.plotly_chart(fig)
-
-	# Attrition by Age
-	# Group employees into age brackets
-	bins = [18, 25, 35, 45, 55, 65]
-	labels = ["18-25", "26-35", "36-45", "46-55", "56-65"]
-	inactive_df["AgeBracket"] = pd.cut(inactive_df["Age"], bins=bins, labels=labels, right=False)
-	# Pie chart for percentage of inactive employees per age bracket
-	age_attrition = inactive_df.groupby("AgeBracket", observed=True)["EmployeeID"].nunique().reset_index(name="Count")
+# Attrition by Tenure
+def tenure_chart():
+	tenure_attrition = backend.headcount("YearsAtCompany", inactive_filters)
+	return px.bar(tenure_attrition, y="YearsAtCompany", x="Count", title="Attrition by Tenure", orientation="h", color_discrete_sequence=neutrals[0:])
+
+# Attrition by Age
+def age_chart():
+	# Pie chart for percentage of inactive employees per age bracket (18-25, 26-35, 36-45, 46-55, 56-65)
+	age_attrition = backend.headcount("AgeBracket", inactive_filters)
 	# Create a pie chart
-	fig = px.pie(age_attrition, names="AgeBracket", values="Count", title="Attrition by Age Bracket", color_discrete_sequence=neutrals)
-	st.plotly_chart(fig)
-
-	# Attrition by Distance
-	# Group employees into Distance brackets
-	bins = [0, 5, 15, 25, 35, 45]
-	labels = ["Very Short", "Short", "Medium", "Long", "Very Long"]
-	inactive_df["DistanceBracket"] = pd.cut(inactive_df["DistanceFromHome (KM)"], bins=bins, labels=labels, right=False)
-	distance_attrition = inactive_df.groupby("DistanceBracket", observed=True)["EmployeeID"].nunique().reset_index(name="Count")
+	return px.pie(age_attrition, names="AgeBracket", values="Count", title="Attrition by Age Bracket", color_discrete_sequence=neutrals)
+
+# Attrition by Distance
+def distance_chart():
+	# Group employees into Distance brackets (Very Short: 0-5 km, Short: 5-15 km, ... Very Long: 35-45 km)
+	distance_attrition = backend.headcount("DistanceBracket", inactive_filters)
 	# Bar Chart for number of inactive employees per Distance Bracket
-	fig = px.bar(distance_attrition, y="DistanceBracket", x="Count", title="Attrition by Distance From Home (km)", 	color_discrete_sequence=neutrals[1:])
-	st.plotly_chart(fig)
+	return px.bar(distance_attrition, y="DistanceBracket", x="Count", title="Attrition by Distance From Home (km)", 	color_discrete_sequence=neutrals[1:])
 
-with col2:
-	# Attrition by Education
+# Attrition by Education
+def education_chart():
 	# Group inactive employees by education level and calculate the count
-	education_attrition = inactive_df.groupby("Education")["EmployeeID"].nunique().reset_index(name="Count")
+	education_attrition = backend.headcount("Education", inactive_filters)
 	# Map education levels to their descriptions
 	education_level = {
     1: "No Formal Qualifications",
@@ -144,20 +131,19 @@ with col2:
     5: "Doctorate"}
 	education_attrition["Education"] = education_attrition["Education"].map(education_level)
 	# Bar chart for attrition by education level
-	fig = px.pie(education_attrition, names="Education", values="Count", title="Attrition by Education", 
+	return px.pie(education_attrition, names="Education", values="Count", title="Attrition by Education", 
                 color_discrete_sequence= neutrals[1:])
-	# Show the chart
-	st.plotly_chart(fig)
-	
-	# Attrition by Overtime
-	overtime_attrition = inactive_df.groupby("OverTime")["EmployeeID"].nunique().reset_index(name="Count")
+
+# Attrition by Overtime
+def overtime_chart():
+	overtime_attrition = backend.headcount("OverTime", inactive_filters)
 	# Pie Chart for percentage of inactive employees by overtime
-	fig = px.pie(overtime_attrition, names="OverTime", values="Count", title="Attrition by Overtime", color_discrete_sequence=neutrals)
-	st.plotly_chart(fig)
+	return px.pie(overtime_attrition, names="OverTime", values="Count", title="Attrition by Overtime", color_discrete_sequence=neutrals)
 
-	# Attrition by Job Satisfaction
+# Attrition by Job Satisfaction
+def satisfaction_chart():
 	# Group by Job Satisfaction Level and map an explanatory dictionary
-	attrition_satisfaction = inactive_df.groupby("JobSatisfaction")["EmployeeID"].nunique().reset_index(name="Count")
+	attrition_satisfaction = backend.headcount("JobSatisfaction", inactive_filters)
 	satisfaction_level = {1:"Very Dissatisfied",
                       2:"Dissatisfied",
                       3:"Neutral",
@@ -165,28 +151,61 @@ with col2:
                       5:"Very Satisfied"}
 	attrition_satisfaction["JobSatisfaction"] = attrition_satisfaction["JobSatisfaction"].map(satisfaction_level)
 	# Bar chart for number of inactive employees per job satisfaction level
-	fig = px.bar(attrition_satisfaction, x="JobSatisfaction", y="Count", title="Attrition by Job Satisfaction", color_discrete_sequence=neutrals[1:])
-	st.plotly_chart(fig)
-
-with col3:
+	return px.bar(attrition_satisfaction, x="JobSatisfaction", y="Count", title="Attrition by Job Satisfaction", color_discrete_sequence=neutrals[1:])
 
-	# Attrition by Job Role
-	job_attrition = inactive_df.groupby("JobRole")["EmployeeID"].nunique().reset_index(name="Count")
+# Attrition by Job Role
+def job_role_chart():
+	job_attrition = backend.headcount("JobRole", inactive_filters)
 	# Bar Chart for number of inactive employees per Job Role
-	fig = px.bar(job_attrition, y="JobRole", x="Count", title="Attrition by Job Role", color_discrete_sequence= neutrals[1:])
-	st.plotly_chart(fig)
+	return px.bar(job_attrition, y="JobRole", x="Count", title="Attrition by Job Role", color_discrete_sequence= neutrals[1:])
 
-	# Attrition by Stock Options
-	stock_attrition = inactive_df.groupby("StockOptionLevel")["EmployeeID"].nunique().reset_index(name="Count")
+# Attrition by Stock Options
+def stock_chart():
+	stock_attrition = backend.headcount("StockOptionLevel", inactive_filters)
 	# Bar Chart for count of inactive employees by stock options
-	fig = px.bar(stock_attrition, x="StockOptionLevel", y="Count", title="Attrition by Stock Option Level", color_discrete_sequence= neutrals[1:])
-	st.plotly_chart(fig)
+	return px.bar(stock_attrition, x="StockOptionLevel", y="Count", title="Attrition by Stock Option Level", color_discrete_sequence= neutrals[1:])
 
-	# Attrition by employee average salary
+# Attrition by employee average salary
+def salary_chart():
 	# Calculate the average salary for each employee
-	average_employee_salary_inactive = inactive_df.groupby('EmployeeID')['Salary'].mean()
-	salary_df = average_employee_salary_inactive.reset_index()
+	salary_df = backend.employee_mean("Salary", inactive_filters)
 	# Histogram for attrition by salary
 	fig = px.histogram(salary_df, x="Salary", title="Attrition by Salary", histnorm="percent", nbins=100, marginal="box", color_discrete_sequence= neutrals[0:])
 	fig.update_layout(bargap=0.1)
-	st.plotly_chart(fig)
\ No newline at end of file
+	return fig
+
+# Set up columns for visuals, with one placeholder per chart
+col1, col2, col3 = st.columns(3)
+
+with col1:
+	charts = [
+		("Attrition by Tenure", st.empty(), tenure_chart),
+		("Attrition by Age Bracket", st.empty(), age_chart),
+		("Attrition by Distance", st.empty(), distance_chart),
+	]
+
+with col2:
+	charts += [
+		("Attrition by Education", st.empty(), education_chart),
+		("Attrition by Overtime", st.empty(), overtime_chart),
+		("Attrition by Job Satisfaction", st.empty(), satisfaction_chart),
+	]
+
+with col3:
+	charts += [
+		("Attrition by Job Role", st.empty(), job_role_chart),
+		("Attrition by Stock Option Level", st.empty(), stock_chart),
+		("Attrition by Salary", st.empty(), salary_chart),
+	]
+
+timings = render_charts(charts)
+
+# Export ----------------------------------------------------------------------------------------------
+
+# Download the rows behind the charts (filtered employee data)
+# The rows are only read from the backend (selected columns only, chunk by chunk) when the export is prepared
+export_section(lambda columns: backend.iter_rows(filters, columns), "Filtered Employee Data", "attrition_analysis",
+               key="page3_export", columns=backend.columns)
+
+# Per-chart timings
+timings_section(timings)
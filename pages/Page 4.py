@@ -1,110 +1,91 @@
 # Import necessary libraries
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.preprocessing import StandardScaler
+from utils.data import load_data, data_version
+from utils.export import export_section
+from utils.online import ARTIFACT_PATH, load_artifact, align_features
+from utils.models import categ, numer, ENGINES, DEFAULT_ENGINE, employee_features, encode_features, split_features, make_model, holdout_metrics, benchmark_engines, load_versioned, MODEL_PATH, FEATURES_PATH
 
 # Page Config
 st.set_page_config(page_title="Page 4", page_icon="🧠", layout="wide")
 
 # Data Importing and Proccessing----------------------------------------------------------------------------------------
-df1 = pd.read_csv("./Data/Employee.csv")
-df2 = pd.read_csv("./Data/PerformanceRating.csv")
+version = data_version()
 
-# Merge the 2 datasets.
-df = df1.merge(df2, how="inner", on="EmployeeID")
+# Build one row per employee (Tenure is derived from the hire and last review dates at ingest, see utils/validation.py).
+# Computed once per data version; the warm-up step (warmup.py) stores them ahead of the first visit.
+@st.cache_data(show_spinner="Preparing features...")
+def load_features(version):
+	df_grouped = load_versioned(FEATURES_PATH, version)
+	if df_grouped is None:
+		df_grouped = employee_features(load_data())
+	return df_grouped
 
-# Data Transformation
-# Convert Hire Date and Review Date to datetime
-df["HireDate"] = pd.to_datetime(df["HireDate"])
-df["ReviewDate"] = pd.to_datetime(df["ReviewDate"])
-
-# For each unique employee id find the last review date and use it in a new column.
-df['LastReview'] = df.groupby('EmployeeID')['ReviewDate'].transform('max')
-
-# Extract Year from Hire Date and Last Review
-df["HireYear"] = df["HireDate"].dt.year
-df["LastReview"] = df["LastReview"].dt.year
-
-# Drop the YearsAtCompany column because it contains mistakes. We will calculate the metric on our own.
-df = df.drop(columns=['YearsAtCompany'])
-
-# Create Tenure column. 
-df["Tenure"] = df["LastReview"] - df["HireYear"]
-df["Tenure"] = df["Tenure"].apply(lambda x: np.nan if x < 0 else x)
-
-# Create AttritionNumerical column.
-df["AttritionNumerical"] = df["Attrition"].map({"Yes": 1, "No": 0})
+df_grouped = load_features(version)
 
 # Model Development ----------------------------------------------------------------------------------
 
-# Based on our correlation analysis we will choose the following variables for our model:
-categ = ['JobRole',  'OverTime',  'MaritalStatus']
-numer =  ['Tenure',	'Age', 'YearsWithCurrManager', 'YearsInMostRecentRole', 'YearsSinceLastPromotion']
-
-chosen_columns = categ + numer + ['AttritionNumerical']
-
-# Grouping our df by EmployeeID and aggregating relevant columns
-df_grouped = df.groupby('EmployeeID').agg({
-    'Tenure': 'mean', 
-    'Age': 'mean',    
-    'YearsWithCurrManager': 'mean',
-    'YearsInMostRecentRole': 'mean',
-    'YearsSinceLastPromotion': 'mean',
-    'AttritionNumerical': 'max',  
-    'JobRole': 'last',   
-    'OverTime': 'last',  
-    'MaritalStatus': 'last',  
-})
-
-df_chosen =  df_grouped[chosen_columns]
-
-# One-hot encoding for categorical variables
-df_encoded = pd.get_dummies(df_chosen, columns=categ)
-
-# Handle missing data
-df_encoded.dropna(inplace=True)
-
-# Now we are ready to split our data.
-
-# Separate the features (X) and target variable (y)
-X = df_encoded.drop(columns=['AttritionNumerical'])
-y = df_encoded['AttritionNumerical']
+# Train each engine once per data version. The default engine is loaded from the warm-up artifact when it is current.
+# (The training data is not hashed: it is fully determined by the data version.)
+@st.cache_resource(show_spinner="Training model...")
+def train_model(engine, version, _X_train, _y_train):
+	model = load_versioned(MODEL_PATH, version, engine=engine)
+	if model is None:
+		model = make_model(engine)
+		model.fit(_X_train, _y_train)
+	return model
+
+# Load the published online model (updated in the background with python -m utils.online).
+# The cache key is the file modification time, so a newly published model is picked up on the next rerun.
+@st.cache_resource
+def load_online_model(modified):
+	return load_artifact(ARTIFACT_PATH)
+
+ONLINE_MODEL = "Online SGD (published)"
+engines = list(ENGINES)
+if os.path.exists(ARTIFACT_PATH):
+	engines.append(ONLINE_MODEL)
+
+# Choose the model engine. All engines are trained on the same features.
+with st.sidebar:
+	st.title("**Attrition Prediction**")
+	engine = st.selectbox("Model Engine", engines, index=engines.index(DEFAULT_ENGINE))
+
+# One-hot encoding, missing data handling and separation of the features (X) and target variable (y)
+X, y = encode_features(df_grouped)
 
 # Training and testing sets (80% train, 20% test)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the scaler
-scaler = StandardScaler()
-
-# Scale the training and test data and assign back to the original variable names
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
-
-# Logistic Regression Model
-
-# Initialize Logistic Regression
-model_lr = LogisticRegression(class_weight={0: 1, 1: 1}, random_state=42, max_iter=1000)
-
-# Train the model on the training data
-model_lr.fit(X_train, y_train)
-
-# Make predictions on the test set
-y_pred_lr = model_lr.predict(X_test)
+X_train, X_test, y_train, y_test = split_features(X, y)
+
+if engine == ONLINE_MODEL:
+	# Use the published model as is (it has already seen the test set, so the metrics below are optimistic)
+	artifact = load_online_model(os.path.getmtime(ARTIFACT_PATH))
+	model = artifact["model"]
+	X, X_test = align_features(X, artifact["columns"]), align_features(X_test, artifact["columns"])
+	with st.sidebar:
+		st.caption(f"Published {artifact['updated']} · {artifact['batches']} online batches · {artifact['rows_seen']} rows seen")
+else:
+	# Initialize the model (scaler + chosen engine) and train it on the training data
+	model = train_model(engine, version, X_train, y_train)
+
+# Evaluate the model on the test set
+report, matrix = holdout_metrics(model, X_test, y_test)
+
+# Score every employee with the trained model (used for the export at the bottom of the page)
+scored_df = df_grouped.loc[X.index, categ + numer + ['AttritionNumerical']].reset_index()
+scored_df["AttritionProbability"] = model.predict_proba(X)[:, 1]
+scored_df["PredictedAttrition"] = model.predict(X)
+scored_df = scored_df.sort_values(by="AttritionProbability", ascending=False)
 
 # Function to make predictions
 def predict_attrition(data):
     
-    # Scale the input data using the same scaler as before
-    data_scaled = scaler.transform(data)
-    
-    # Make the prediction and get the probability
-    prediction = model_lr.predict(data_scaled)
-    prob = model_lr.predict_proba(data_scaled)[0][1]
+    # The model scales the input data with the same scaler as in training
+    prediction = model.predict(data)
+    prob = model.predict_proba(data)[0][1]
 
     return prediction, prob
 
@@ -197,4 +178,36 @@ with st.container(border=True):
     		if prediction == 1:
         		st.subheader(f"The model predicts the employee will leave with a probability of {100*prob:.2f}%.")
     		else:
-        		st.subheader(f"The model predicts the employee will stay with a probability of {100 - 100*prob:.2f}%.")
\ No newline at end of file
+        		st.subheader(f"The model predicts the employee will stay with a probability of {100 - 100*prob:.2f}%.")
+
+# Model Evaluation -----------------------------------------------------------------------------------------------------
+
+# Color pallette for graphs
+neutrals=["#EDE6DB", "#C2A68C", "#5A3E36", "#2E8B57", "#556B2F"]
+
+st.subheader(f"Model Evaluation: {engine}")
+
+col1, col2 = st.columns(2)
+
+with col1:
+	# Classification report on the test set
+	report_df = pd.DataFrame(report).transpose().rename(index={"0": "Stay", "1": "Leave"})
+	st.dataframe(report_df.style.format("{:.2f}"))
+
+with col2:
+	# Confusion matrix on the test set
+	fig = px.imshow(matrix, x=["Stay", "Leave"], y=["Stay", "Leave"], text_auto=True,
+                 labels={"x": "Predicted", "y": "Actual", "color": "Employees"},
+                 title="Confusion Matrix", color_continuous_scale=neutrals[:3])
+	st.plotly_chart(fig)
+
+# Benchmark all engines on the same split: fit time, inference latency, model size and holdout metrics
+with st.expander("Model Engine Benchmark ⏱️"):
+	if st.button("Run Benchmark"):
+		benchmark_df, _ = benchmark_engines(X, y)
+		st.dataframe(benchmark_df.set_index("Engine").style.format("{:.3f}"))
+
+# Export ---------------------------------------------------------------------------------------------------------------
+
+# Download the scored employees (highest attrition probability first)
+export_section(scored_df, "Scored Employees", "scored_employees", key="page4_export")
@@ -0,0 +1,72 @@
+# Equivalence checks of the query backends and of the aggregates built on them.
+# Run from the repository root with: python -m pytest
+import itertools
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils.backends import DuckDBBackend, PandasBackend, available_backends, page_queries, same_results, write_parquet_tables
+from utils.data import merge_tables
+from utils.database import ConnectionPool, DatabaseBackend, connect_sqlite, write_sqlite
+from utils.sketches import CHECK_WITHIN_1, CHECK_WITHIN_2, check_error_bound
+from utils.thresholds import BREAKDOWNS, ThresholdGrid, policy_filters
+from utils.validation import read_csv, validate_tables
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "Data"
+
+# (years since last promotion, average rating) pairs of the threshold grid checks, including the edges of the grid
+THRESHOLDS = [(0, 1.0), (2, 2.5), (4, 3.3), (8, 3.5), (10, 4.0), (20, 5.0)]
+
+# Set sizes of the sketch error bound check: a small count and the range of the classic estimator switch (10,240)
+SKETCH_SIZES = [1_000, 10_000, 12_000]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+
+    # The validated CSVs behind every backend: pandas, DuckDB (when it is installed) and a SQLite database
+    employees, reviews, _ = validate_tables(read_csv(DATA_DIR / "Employee.csv"), read_csv(DATA_DIR / "PerformanceRating.csv"))
+    folder = tmp_path_factory.mktemp("backends")
+    backends = {"pandas": PandasBackend(merge_tables(employees, reviews))}
+    if "DuckDB" in available_backends():
+        write_parquet_tables(employees, reviews, str(folder / "Employee.parquet"), str(folder / "PerformanceRating.parquet"))
+        backends["DuckDB"] = DuckDBBackend(str(folder / "Employee.parquet"), str(folder / "PerformanceRating.parquet"))
+    write_sqlite(employees, reviews, str(folder / "hr.db"))
+    pool = ConnectionPool(connect_sqlite(str(folder / "hr.db")))
+    backends["SQLite"] = DatabaseBackend(pool)
+    yield backends
+    pool.close()
+
+
+def backend(backends, name):
+    if name not in backends:
+        pytest.skip(f"{name} is not installed")
+    return backends[name]
+
+
+@pytest.mark.parametrize("name", ["DuckDB", "SQLite"])
+def test_page_queries_match_pandas(backends, name):
+    assert same_results(page_queries(backends["pandas"]), page_queries(backend(backends, name)))
+
+
+@pytest.mark.parametrize("name", ["pandas", "DuckDB", "SQLite"])
+def test_threshold_grid_matches_backend(backends, name):
+    source = backend(backends, name)
+    grid = ThresholdGrid(source)
+    for (years, rating), op in itertools.product(THRESHOLDS, [">=", "<"]):
+        filters = policy_filters(years, op, rating)
+        assert grid.headcount(filters=filters) == source.headcount(filters=filters)
+        for by in BREAKDOWNS:
+            pd.testing.assert_frame_equal(grid.headcount(by, filters), source.headcount(by, filters), check_dtype=False)
+
+
+def test_threshold_grid_rejects_ratings_off_the_grid(backends):
+    with pytest.raises(ValueError):
+        ThresholdGrid(backends["pandas"]).headcount(filters=policy_filters(8, ">=", 3.55))
+
+
+def test_sketch_error_bound():
+    results = check_error_bound(sizes=SKETCH_SIZES)
+    assert (results["Within 1 SE"] >= CHECK_WITHIN_1).all(), results
+    assert (results["Within 2 SE"] >= CHECK_WITHIN_2).all(), results
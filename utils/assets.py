@@ -0,0 +1,100 @@
+# Home page images.
+# The images are resized ahead of time by the warm-up step (warmup.py) and stored under ./static with the content
+# hash in the file name, so the Home page neither fetches a remote image nor ships the full resolution originals.
+# ./static is a build output (not tracked): without it, the pages show the original files.
+import hashlib
+import io
+import json
+import os
+import urllib.request
+
+ASSETS_DIR = "./static"
+MANIFEST_PATH = os.path.join(ASSETS_DIR, "manifest.json")
+
+# Images are displayed 400px wide; 800px keeps them sharp on high-DPI screens
+MAX_WIDTH = 800
+
+# Original sources of the Home page images. No banner image is shipped: Home shows the banner only when an image
+# cleared for use is placed at its path.
+HOME_IMAGES = {
+    "banner": "./Data/hr banner.jpg",
+    "andriani": "./Data/andriani plus qr.jpg",
+    "androniki": "./Data/androniki plus qr.jpg",
+    "nikolas": "./Data/nikolas plus qr.jpg",
+}
+
+
+def read_manifest():
+
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def read_source(source, timeout=10):
+
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=timeout) as response:
+            return response.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def resize_image(raw, max_width=MAX_WIDTH):
+
+    # Pillow is installed together with streamlit; it is only needed when the assets are built
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(raw)).convert("RGB")
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_assets(images=HOME_IMAGES, max_width=MAX_WIDTH):
+
+    # Resize every image and store it as <name>.<content hash>.jpg.
+    # An image that cannot be read (e.g. a missing file, or no network for a remote source) keeps its previous entry.
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    manifest = read_manifest()
+    failed = []
+
+    for name, source in images.items():
+        try:
+            data = resize_image(read_source(source), max_width)
+        except OSError as error:
+            failed.append((name, str(error)))
+            continue
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        path = os.path.join(ASSETS_DIR, f"{name}.{digest}.jpg")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        manifest[name] = path
+
+    # Remove outdated versions of the images
+    current = {os.path.basename(path) for path in manifest.values()}
+    for file_name in os.listdir(ASSETS_DIR):
+        if file_name.endswith(".jpg") and file_name not in current:
+            os.remove(os.path.join(ASSETS_DIR, file_name))
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest, failed
+
+
+def asset(name):
+
+    # Local pre-resized image if it has been built, otherwise the original source if it is a local file.
+    # A remote source is never fetched while a page renders: without a local copy there is no image (None).
+    path = read_manifest().get(name)
+    if path and os.path.exists(path):
+        return path
+    source = HOME_IMAGES[name]
+    return source if os.path.exists(source) else None
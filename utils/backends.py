@@ -0,0 +1,443 @@
+# Query backends for the dashboard pages.
+# The pages ask a backend for distinct employee counts, per-employee means and filtered rows, instead of running
+# pandas code on a fully materialized frame. The backends give the same numbers:
+#   - PandasBackend: the merged frame in memory (default)
+#   - DuckDBBackend: an embedded, multi-threaded columnar engine over Parquet files. Filters and projections are
+#     pushed down to the files, so the review history does not have to fit in memory. Requires `pip install duckdb`.
+#   - DatabaseBackend (utils/database.py): the tables of a relational database, through a shared connection pool.
+#
+# Filters are lists of (column, operator, value) tuples, e.g. [("Department", "in", ["Sales"]), ("Attrition", "==", "Yes")].
+# Besides the dataset columns, the backends know the derived columns below (bins and the average manager rating).
+#
+#     python -m utils.backends --employees 1000000      (benchmark both backends on a synthetic workforce history)
+import argparse
+import operator
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.files import atomic_write
+
+# Derived bin columns: name -> (source column, bin edges, labels). Bins include the left edge (right=False).
+BINS = {
+    "TenureGroup": ("YearsAtCompany", [0, 2, 5, 10, float("inf")], ["0-2 years", "3-5 years", "6-10 years", "11-15 years"]),
+    "AgeBracket": ("Age", [18, 25, 35, 45, 55, 65], ["18-25", "26-35", "36-45", "46-55", "56-65"]),
+    "DistanceBracket": ("DistanceFromHome (KM)", [0, 5, 15, 25, 35, 45], ["Very Short", "Short", "Medium", "Long", "Very Long"]),
+}
+
+# Derived employee-level column: average ManagerRating over all the reviews of the employee
+AVERAGE_RATING = "AverageManagerRating"
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+}
+
+# Parquet files read by the DuckDB backend
+PARQUET_DIR = "./artifacts/parquet"
+EMPLOYEE_PARQUET = os.path.join(PARQUET_DIR, "Employee.parquet")
+REVIEW_PARQUET = os.path.join(PARQUET_DIR, "PerformanceRating.parquet")
+
+# Rows per chunk of the streamed rows (exports)
+CHUNK_ROWS = 50_000
+
+
+def as_list(columns):
+
+    if columns is None:
+        return []
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+def filter_columns(filters):
+
+    return [column for column, _, _ in filters or []]
+
+
+class Backend:
+
+    name = None
+
+    # Dataset columns (set by every backend)
+    columns = []
+
+    def headcount(self, by=None, filters=None):
+        # Number of distinct employees (int), or a frame with the `by` columns and a Count column
+        raise NotImplementedError
+
+    def employee_mean(self, column, filters=None):
+        # Frame with one row per employee (EmployeeID and the mean of `column`), sorted by EmployeeID
+        raise NotImplementedError
+
+    def rows(self, filters=None, columns=None, distinct=False):
+        # The filtered rows themselves
+        raise NotImplementedError
+
+    def iter_rows(self, filters=None, columns=None, distinct=False, chunk_rows=CHUNK_ROWS):
+        # The same rows as consecutive frames of at most chunk_rows rows (e.g. for the exports)
+        yield self.rows(filters, columns, distinct)
+
+    def values(self, column):
+        # Sorted distinct values of a column (options of the sidebar filters)
+        raise NotImplementedError
+
+    @staticmethod
+    def finish(result, by):
+
+        # Same output for every backend: bin columns as ordered categories, rows sorted by the `by` columns
+        for column in by:
+            if column in BINS:
+                result[column] = pd.Categorical(result[column], categories=BINS[column][2], ordered=True)
+        return result.sort_values(by).reset_index(drop=True)
+
+
+class PandasBackend(Backend):
+
+    name = "pandas"
+
+    def __init__(self, df):
+        self.df = df
+        self.columns = list(df.columns)
+        self.derived = {}
+
+    def column(self, name):
+
+        # Dataset column or derived column (computed once and reused)
+        if name in self.df.columns:
+            return self.df[name]
+        if name not in self.derived:
+            if name in BINS:
+                source, bins, labels = BINS[name]
+                self.derived[name] = pd.cut(self.df[source], bins=bins, labels=labels, right=False)
+            elif name == AVERAGE_RATING:
+                self.derived[name] = self.df.groupby("EmployeeID")["ManagerRating"].transform("mean")
+            else:
+                raise KeyError(f"Unknown column: {name}")
+        return self.derived[name]
+
+    def mask(self, filters):
+
+        mask = pd.Series(True, index=self.df.index)
+        for column, op, value in filters or []:
+            values = self.column(column)
+            mask &= values.isin(value) if op == "in" else OPERATORS[op](values, value)
+        return mask
+
+    def select(self, columns, filters):
+
+        # Only the requested columns of the filtered rows
+        mask = self.mask(filters)
+        return pd.DataFrame({column: self.column(column)[mask] for column in dict.fromkeys(columns)})
+
+    def headcount(self, by=None, filters=None):
+        by = as_list(by)
+        df = self.select(["EmployeeID"] + by, filters)
+        if not by:
+            return int(df["EmployeeID"].nunique())
+        result = df.groupby(by, observed=True)["EmployeeID"].nunique().reset_index(name="Count")
+        return self.finish(result, by)
+
+    def employee_mean(self, column, filters=None):
+        df = self.select(["EmployeeID", column], filters)
+        return df.groupby("EmployeeID")[column].mean().reset_index()
+
+    def rows(self, filters=None, columns=None, distinct=False):
+        df = self.select(as_list(columns) or self.columns, filters)
+        return df.drop_duplicates() if distinct else df
+
+    def iter_rows(self, filters=None, columns=None, distinct=False, chunk_rows=CHUNK_ROWS):
+
+        # The frame is in memory already: only one chunk of the selected columns is copied at a time
+        # (distinct rows are deduplicated on the whole selection first)
+        if distinct:
+            df = self.rows(filters, columns, distinct=True)
+            for start in range(0, len(df), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+            return
+        columns = list(dict.fromkeys(as_list(columns) or self.columns))
+        positions = np.flatnonzero(self.mask(filters).to_numpy())
+        for start in range(0, len(positions), chunk_rows):
+            chunk = positions[start:start + chunk_rows]
+            yield pd.DataFrame({column: self.column(column).iloc[chunk] for column in columns})
+
+    def values(self, column):
+        return sorted(self.column(column).dropna().unique())
+
+
+class SQLBackend(Backend):
+
+    # Shared SQL generation of the database backends. Filters, bins and the per-employee aggregations run in the
+    # database; only the (small) result tables come back to Python. The SQL is portable (ANSI joins, CASE,
+    # GROUP BY positions), so it runs on DuckDB, SQLite and the usual server databases.
+    # Subclasses set the `employees`/`reviews` table expressions, the column lists and implement `query`.
+    employees = None
+    reviews = None
+    employee_columns = []
+    review_columns = []
+
+    # Parameter marker of the driver ("?" for DuckDB/SQLite, "%s" for the format/pyformat drivers)
+    placeholder = "?"
+
+    def query(self, sql, params=None):
+        # Result of the query as a DataFrame
+        raise NotImplementedError
+
+    def iter_query(self, sql, params=None, chunk_rows=CHUNK_ROWS):
+        # Result of the query as consecutive frames (the drivers that can fetch in batches override it)
+        yield self.query(sql, params)
+
+    def expression(self, name):
+
+        # SQL expression of a dataset or derived column
+        if name in BINS:
+            source, bins, labels = BINS[name]
+            cases = []
+            for low, high, label in zip(bins[:-1], bins[1:], labels):
+                upper = "" if high == float("inf") else f' AND "{source}" < {high}'
+                cases.append(f"""WHEN "{source}" >= {low}{upper} THEN '{label}'""")
+            return f"CASE {' '.join(cases)} END"
+        if name in self.employee_columns or name in self.review_columns or name == AVERAGE_RATING:
+            return f'"{name}"'
+        raise KeyError(f"Unknown column: {name}")
+
+    def reviewed_employees(self):
+
+        # Join that keeps the employees with at least one review (one row per employee)
+        return f"JOIN (SELECT DISTINCT EmployeeID FROM {self.reviews}) AS reviews USING (EmployeeID)"
+
+    def source(self, columns, per_employee=False):
+
+        # Join the 2 tables (and the average rating only when it is used).
+        # Per-employee results that only use employee columns do not need the review rows, only the reviewed employees.
+        sources = [BINS[column][0] if column in BINS else column for column in columns]
+        if per_employee and all(column in self.employee_columns or column == AVERAGE_RATING for column in sources):
+            sql = f"{self.employees} AS employees {self.reviewed_employees()}"
+        else:
+            sql = f"{self.employees} AS employees JOIN {self.reviews} AS reviews USING (EmployeeID)"
+        if AVERAGE_RATING in columns:
+            sql += (f' JOIN (SELECT EmployeeID, AVG("ManagerRating") AS "{AVERAGE_RATING}" '
+                    f"FROM {self.reviews} GROUP BY EmployeeID) AS ratings USING (EmployeeID)")
+        return sql
+
+    def where(self, filters, not_null=()):
+
+        conditions, params = [], []
+        for column, op, value in filters or []:
+            if op == "in":
+                if not value:
+                    conditions.append("1 = 0")
+                    continue
+                conditions.append(f"{self.expression(column)} IN ({', '.join([self.placeholder] * len(value))})")
+                params.extend(value)
+            else:
+                conditions.append(f"{self.expression(column)} {op} {self.placeholder}")
+                params.append(value)
+        conditions += [f"{self.expression(column)} IS NOT NULL" for column in not_null]
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def headcount(self, by=None, filters=None):
+        by = as_list(by)
+        where, params = self.where(filters, not_null=by)
+        source = self.source(by + filter_columns(filters), per_employee=True)
+        if not by:
+            return int(self.query(f"SELECT COUNT(DISTINCT EmployeeID) AS Count FROM {source}{where}", params)["Count"].iloc[0])
+        select = ", ".join(f'{self.expression(column)} AS "{column}"' for column in by)
+        group = ", ".join(str(i) for i in range(1, len(by) + 1))
+        result = self.query(f"SELECT {select}, COUNT(DISTINCT EmployeeID) AS Count FROM {source}{where} GROUP BY {group}", params)
+        return self.finish(result, by)
+
+    def employee_mean(self, column, filters=None):
+        where, params = self.where(filters)
+        source = self.source([column] + filter_columns(filters), per_employee=True)
+        return self.query(f'SELECT EmployeeID, AVG({self.expression(column)}) AS "{column}" FROM {source}{where} '
+                          f"GROUP BY EmployeeID ORDER BY EmployeeID", params)
+
+    def rows_query(self, filters, columns, distinct):
+        columns = list(dict.fromkeys(as_list(columns) or self.columns))
+        where, params = self.where(filters)
+        select = ", ".join(f'{self.expression(column)} AS "{column}"' for column in columns)
+        return f"SELECT {'DISTINCT ' if distinct else ''}{select} FROM {self.source(columns + filter_columns(filters))}{where}", params
+
+    def rows(self, filters=None, columns=None, distinct=False):
+        return self.query(*self.rows_query(filters, columns, distinct))
+
+    def iter_rows(self, filters=None, columns=None, distinct=False, chunk_rows=CHUNK_ROWS):
+        sql, params = self.rows_query(filters, columns, distinct)
+        return self.iter_query(sql, params, chunk_rows)
+
+    def values(self, column):
+        table = self.employees if column in self.employee_columns else self.reviews
+        return self.query(f'SELECT DISTINCT "{column}" FROM {table} WHERE "{column}" IS NOT NULL ORDER BY 1')[column].tolist()
+
+
+class DuckDBBackend(SQLBackend):
+
+    name = "DuckDB"
+
+    def __init__(self, employee_path=EMPLOYEE_PARQUET, review_path=REVIEW_PARQUET, threads=None):
+
+        # duckdb is an optional dependency, imported only when this backend is used
+        import duckdb
+
+        self.connection = duckdb.connect()
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        self.employees = f"read_parquet('{employee_path}')"
+        self.reviews = f"read_parquet('{review_path}')"
+        self.employee_columns = self.query(f"SELECT * FROM {self.employees} LIMIT 0").columns.tolist()
+        self.review_columns = self.query(f"SELECT * FROM {self.reviews} LIMIT 0").columns.tolist()
+        self.columns = list(dict.fromkeys(self.employee_columns + self.review_columns))
+
+    def query(self, sql, params=None):
+
+        # One cursor per query: the connection is shared by all the sessions of the server
+        cursor = self.connection.cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def iter_query(self, sql, params=None, chunk_rows=CHUNK_ROWS):
+
+        # Arrow record batches of the result, converted one at a time (to_arrow_reader replaces
+        # fetch_record_batch in the recent DuckDB versions)
+        cursor = self.connection.cursor()
+        try:
+            result = cursor.execute(sql, params or [])
+            reader = result.to_arrow_reader(chunk_rows) if hasattr(result, "to_arrow_reader") else result.fetch_record_batch(chunk_rows)
+            for batch in reader:
+                yield batch.to_pandas()
+        finally:
+            cursor.close()
+
+    def reviewed_employees(self):
+
+        # DuckDB pushes the projections and filters of the outer query down to the Parquet scans; a semi join
+        # keeps the employees with reviews without reading the review rows
+        return f"SEMI JOIN {self.reviews} AS reviews USING (EmployeeID)"
+
+
+def write_parquet_tables(employees, reviews, employee_path=EMPLOYEE_PARQUET, review_path=REVIEW_PARQUET):
+
+    # Columnar copies of the cleaned tables for the DuckDB backend (swapped in complete, DuckDB may be reading them)
+    atomic_write(employee_path, lambda path: employees.to_parquet(path, index=False))
+    atomic_write(review_path, lambda path: reviews.to_parquet(path, index=False))
+
+
+def available_backends():
+
+    backends = ["pandas"]
+    try:
+        import duckdb  # noqa: F401
+        backends.append("DuckDB")
+    except ImportError:
+        pass
+    return backends
+
+
+# Benchmark ------------------------------------------------------------------------------------------------------------
+
+def synthetic_tables(employees, reviews, n_employees, seed=42):
+
+    # Resample the real tables into a larger workforce history with new, unique employee ids
+    rng = np.random.default_rng(seed)
+    picked = rng.integers(0, len(employees), n_employees)
+    big_employees = employees.iloc[picked].reset_index(drop=True)
+    big_employees["EmployeeID"] = [f"E{i:08d}" for i in range(n_employees)]
+
+    # Every synthetic employee gets the reviews of the employee it was sampled from
+    review_index = reviews.groupby("EmployeeID").indices
+    source_ids = employees["EmployeeID"].to_numpy()[picked]
+    parts, owners = [], []
+    for i, source_id in enumerate(source_ids):
+        rows = review_index.get(source_id)
+        if rows is not None:
+            parts.append(rows)
+            owners.append(np.full(len(rows), i))
+    rows, owners = np.concatenate(parts), np.concatenate(owners)
+    big_reviews = reviews.iloc[rows].reset_index(drop=True)
+    big_reviews["EmployeeID"] = big_employees["EmployeeID"].to_numpy()[owners]
+    big_reviews["PerformanceID"] = [f"PR{i:09d}" for i in range(len(big_reviews))]
+    return big_employees, big_reviews
+
+
+def page_queries(backend):
+
+    # The queries of Pages 1-3 (without the charts)
+    attrition = [("Attrition", "==", "Yes")]
+    promoted = [("YearsSinceLastPromotion", ">=", 8), (AVERAGE_RATING, ">=", 3.5), ("Attrition", "==", "No")]
+    results = {
+        "Total Employees": backend.headcount(),
+        "Inactive Employees": backend.headcount(filters=attrition),
+        "Average Salary": backend.employee_mean("Salary")["Salary"].mean(),
+        "Promoted": backend.headcount(filters=promoted),
+    }
+    for column in ["Gender", "MaritalStatus", "TenureGroup", "Age", "JobRole", "Department"]:
+        results[f"Headcount by {column}"] = backend.headcount(column)
+    for column in ["YearsAtCompany", "AgeBracket", "DistanceBracket", "Education", "OverTime", "JobSatisfaction", "JobRole", "StockOptionLevel"]:
+        results[f"Attrition by {column}"] = backend.headcount(column, attrition)
+    results["Promoted by JobRole"] = backend.headcount("JobRole", promoted)
+    results["Sales, Female"] = backend.headcount("TenureGroup", [("Department", "in", ["Sales"]), ("Gender", "in", ["Female"])])
+    return results
+
+
+def same_results(a, b):
+
+    for key in a:
+        if isinstance(a[key], pd.DataFrame):
+            pd.testing.assert_frame_equal(a[key], b[key], check_dtype=False)
+        elif not np.isclose(a[key], b[key]):
+            raise AssertionError(f"{key}: {a[key]} != {b[key]}")
+    return True
+
+
+if __name__ == "__main__":
+
+    from utils.data import merge_tables, read_tables
+
+    parser = argparse.ArgumentParser(description="Benchmark the pandas and DuckDB backends on a synthetic workforce history.")
+    parser.add_argument("--employees", type=int, default=1_000_000, help="Number of synthetic employees")
+    parser.add_argument("--folder", default="./artifacts/benchmark", help="Folder for the synthetic Parquet files")
+    parser.add_argument("--duckdb-only", action="store_true", help="Skip the pandas backend (when the merged frame does not fit in memory)")
+    args = parser.parse_args()
+
+    employee_path = os.path.join(args.folder, "Employee.parquet")
+    review_path = os.path.join(args.folder, "PerformanceRating.parquet")
+    employees, reviews = synthetic_tables(*read_tables(), args.employees)
+    write_parquet_tables(employees, reviews, employee_path, review_path)
+    print(f"{len(employees):,} employees, {len(reviews):,} reviews")
+
+    timings = {}
+    results = {}
+    if not args.duckdb_only:
+        start = time.perf_counter()
+        df = merge_tables(employees, reviews)
+        timings["pandas load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results["pandas"] = page_queries(PandasBackend(df))
+        timings["pandas queries"] = time.perf_counter() - start
+        del df
+    del employees, reviews
+
+    start = time.perf_counter()
+    backend = DuckDBBackend(employee_path, review_path)
+    timings["DuckDB load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results["DuckDB"] = page_queries(backend)
+    timings["DuckDB queries"] = time.perf_counter() - start
+
+    for label, seconds in timings.items():
+        print(f"{label:<20}{seconds:8.2f} s")
+    if not args.duckdb_only:
+        print(f"Speedup (queries): {timings['pandas queries'] / timings['DuckDB queries']:.1f}x")
+        print(f"Identical results: {same_results(results['pandas'], results['DuckDB'])}")
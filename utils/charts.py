@@ -0,0 +1,57 @@
+# Parallel chart rendering for the dashboard pages.
+# The charts of a page are independent: each one runs its own backend queries and builds its own Plotly figure.
+# They run on a thread pool, while the script thread shows every figure in its placeholder (created beforehand in
+# layout order) as soon as it is ready. Streamlit calls stay on the script thread: the worker threads only compute.
+# Only the DuckDB and SQL database backends release the GIL while their queries run, so only their queries overlap.
+# The pandas group-bys and the Plotly figure building are mostly Python code that holds the GIL: with the pandas
+# backend the charts run about one after the other, and the pool only shows each one as soon as it is ready.
+#
+# The time of a chart is the CPU time of its worker thread (time.thread_time), not the wall-clock time, which would
+# include the time spent waiting for the GIL behind the other charts. Work done by DuckDB's own threads or by a
+# database server is not part of it: the end-to-end time of the page is the "Shown After" of its last chart.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import streamlit as st
+
+CHART_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+
+def timed_figure(make_figure):
+
+    start = time.thread_time()
+    fig = make_figure()
+    return fig, time.thread_time() - start
+
+
+def render_charts(charts, workers=CHART_WORKERS):
+
+    # charts: list of (title, placeholder, function returning the figure).
+    # Returns the CPU time of every chart and the time since the start when it was shown.
+    start = time.perf_counter()
+    timings = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(timed_figure, make_figure): (title, placeholder) for title, placeholder, make_figure in charts}
+        for future in as_completed(futures):
+            title, placeholder = futures[future]
+            fig, seconds = future.result()
+            placeholder.plotly_chart(fig)
+            timings.append({"Chart": title, "CPU Seconds": seconds, "Shown After": time.perf_counter() - start})
+
+    # Same order as the layout
+    order = [title for title, _, _ in charts]
+    return pd.DataFrame(timings).sort_values("Chart", key=lambda titles: titles.map(order.index)).reset_index(drop=True)
+
+
+def timings_section(timings):
+
+    # Per-chart timings of the last run of the page
+    with st.expander("Chart timings ⏱️"):
+        st.caption(f"All charts shown after {timings['Shown After'].max():.2f} s "
+                   f"(CPU time of the chart threads: {timings['CPU Seconds'].sum():.2f} s, without the query engine threads)")
+        st.dataframe(timings, hide_index=True, column_config={
+            "CPU Seconds": st.column_config.NumberColumn(format="%.3f"),
+            "Shown After": st.column_config.NumberColumn(format="%.3f"),
+        })
@@ -0,0 +1,188 @@
+# Data loading shared by the pages.
+# The CSVs are validated and repaired once per data version (utils/validation.py). The merged dataset is kept in the
+# Streamlit cache. When the warm-up step (warmup.py) has written a snapshot for the current data version, we read
+# the snapshot instead of merging the cleaned tables again.
+import json
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from utils.files import atomic_write, load_versioned, write_json
+from utils.validation import load_clean_tables
+from utils.backends import PARQUET_DIR, DuckDBBackend, PandasBackend, available_backends, write_parquet_tables
+from utils.database import ConnectionPool, DatabaseBackend, connect_sqlite, database_url, sqlite_path
+from utils.sketches import RELATIVE_ERROR, SketchBackend
+from utils.thresholds import ThresholdGrid
+
+EMPLOYEE_PATH = "./Data/Employee.csv"
+REVIEW_PATH = "./Data/PerformanceRating.csv"
+
+# Files written by the warm-up step
+ARTIFACTS_DIR = "./artifacts"
+SNAPSHOT_PATH = os.path.join(ARTIFACTS_DIR, "merged.pkl")
+VERSION_PATH = os.path.join(ARTIFACTS_DIR, "data_version.json")
+PARQUET_VERSION_PATH = os.path.join(PARQUET_DIR, "data_version.json")
+
+# Precomputed aggregates of the current data version (the same for the pandas and DuckDB backends)
+THRESHOLD_GRID_PATH = os.path.join(ARTIFACTS_DIR, "threshold_grid.joblib")
+SKETCHES_PATH = os.path.join(ARTIFACTS_DIR, "sketches.joblib")
+
+
+def data_version(paths=(EMPLOYEE_PATH, REVIEW_PATH)):
+
+    # Cheap version key for the source files: size and modification time of each file
+    version = []
+    for path in paths:
+        stat = os.stat(path)
+        version.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(version)
+
+
+def is_current(path, version_path, version=None):
+
+    # True if the file exists and was built from the current data version
+    if not (os.path.exists(path) and os.path.exists(version_path)):
+        return False
+    with open(version_path) as f:
+        return json.load(f).get("version") == (version or data_version())
+
+
+def snapshot_is_current(version=None):
+    return is_current(SNAPSHOT_PATH, VERSION_PATH, version)
+
+
+def read_tables():
+
+    # The 2 datasets after validation and repair (HireDate and ReviewDate are already datetime, Tenure is derived).
+    # Validation runs once per data version; afterwards the cleaned snapshot is read.
+    return load_clean_tables(EMPLOYEE_PATH, REVIEW_PATH, data_version())
+
+
+def merge_tables(df1, df2):
+
+    # Merge the 2 datasets.
+    return df1.merge(df2, how="inner", on="EmployeeID")
+
+
+def write_snapshot(df, version=None):
+
+    # Save the merged frame for the current data version (used by the warm-up step).
+    # The files are swapped in complete, while the pages may be reading them.
+    atomic_write(SNAPSHOT_PATH, df.to_pickle)
+    write_json({"version": version or data_version()}, VERSION_PATH)
+
+
+def write_parquet(version=None):
+
+    # Columnar copies of the cleaned tables for the DuckDB backend
+    write_parquet_tables(*read_tables())
+    write_json({"version": version or data_version()}, PARQUET_VERSION_PATH)
+
+
+def read_data():
+
+    # Merged dataset without the Streamlit cache: snapshot if it is current, CSVs otherwise
+    if snapshot_is_current():
+        return pd.read_pickle(SNAPSHOT_PATH)
+    return merge_tables(*read_tables())
+
+
+@st.cache_data(show_spinner="Loading data...")
+def _load_data(version):
+    return read_data()
+
+
+@st.cache_data(show_spinner="Loading data...")
+def _load_tables(version):
+    return read_tables()
+
+
+def load_data():
+
+    # Merged Employee/PerformanceRating frame. The data version is part of the cache key,
+    # so changed CSVs are picked up without restarting the server.
+    return _load_data(data_version())
+
+
+def load_tables():
+
+    # The 2 datasets as read from the CSVs (Employee, PerformanceRating)
+    return _load_tables(data_version())
+
+
+@st.cache_resource(show_spinner="Preparing query backend...")
+def _load_backend(name, version):
+
+    # One backend per data version, shared by all the sessions
+    if name == "DuckDB":
+        if not is_current(PARQUET_DIR, PARQUET_VERSION_PATH, version):
+            write_parquet(version)
+        return DuckDBBackend()
+    return PandasBackend(read_data())
+
+
+@st.cache_resource(show_spinner="Connecting to the database...")
+def _load_database_backend(url):
+
+    # One connection pool per database, shared by all the sessions. The database is queried on every rerun,
+    # so the pages always show its current content.
+    return DatabaseBackend(ConnectionPool(connect_sqlite(sqlite_path(url))))
+
+
+def backend_version(name):
+
+    # Cache key of the results precomputed from a backend: the data version of the CSVs, or the current hour for the
+    # SQL database, which changes without a data version (its precomputed results are rebuilt every hour)
+    if name == DatabaseBackend.name:
+        return time.strftime("%Y-%m-%d %H")
+    return data_version()
+
+
+# Entries kept per precomputed result: one per backend, plus the previous version while it is replaced
+@st.cache_resource(show_spinner="Building headcount sketches...", max_entries=4)
+def _load_sketch_backend(name, version, _backend):
+
+    # The sketches are shared by all the sessions and rebuilt for a new backend version.
+    # The sketches stored by the warm-up step are used when they were built from the current data version.
+    cubes = None if name == DatabaseBackend.name else load_versioned(SKETCHES_PATH, version)
+    return SketchBackend(_backend, cubes)
+
+
+def load_backend():
+
+    # Query backend chosen in the sidebar (pandas, DuckDB when it is installed, the SQL database when it is configured).
+    # With "Approximate counts", the headcounts come from HyperLogLog sketches (utils/sketches.py).
+    backends = available_backends()
+    if database_url():
+        backends.append(DatabaseBackend.name)
+    with st.sidebar:
+        name = st.selectbox("Query Backend", backends, key="backend") if len(backends) > 1 else backends[0]
+        approximate = st.toggle("Approximate counts", key="approximate",
+                                help=f"Faster headcounts from HyperLogLog sketches, within ±{RELATIVE_ERROR:.1%} of the exact "
+                                     f"count in 2 cases out of 3. Turn it off for official reports.")
+    if name == DatabaseBackend.name:
+        backend = _load_database_backend(database_url())
+    else:
+        backend = _load_backend(name, data_version())
+    if approximate:
+        return _load_sketch_backend(name, backend_version(name), backend)
+    return backend
+
+
+@st.cache_resource(show_spinner="Precomputing policy thresholds...", max_entries=4)
+def _load_threshold_grid(name, version, _backend):
+
+    # Grid stored by the warm-up step if it was built from the current data version
+    grid = None if name == DatabaseBackend.name else load_versioned(THRESHOLD_GRID_PATH, version)
+    return grid or ThresholdGrid(_backend)
+
+
+def load_threshold_grid(backend):
+
+    # Page 2 promotion/retrenchment counts for every threshold pair, shared by all the sessions.
+    # The counts and the totals they are compared with are always exact, also with "Approximate counts".
+    if isinstance(backend, SketchBackend):
+        backend = backend.backend
+    return _load_threshold_grid(backend.name, backend_version(backend.name), backend)
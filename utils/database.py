@@ -0,0 +1,201 @@
+# Relational database source for the dashboard pages.
+# The Employee and PerformanceRating tables are read from a database instead of the CSVs. The pages query it through
+# the same backend interface as the other backends (utils/backends.py): filters, bins and the EmployeeID aggregations
+# run in SQL, and only the small result tables are fetched, in batches, straight into columns.
+#
+# The database is set with the HR_DATABASE_URL environment variable. SQLite is supported out of the box
+# (sqlite:///path/to/hr.db); other databases can be used with DatabaseBackend and the `connect` function of their
+# DB-API driver. Load the current CSVs into a local SQLite database (and check it against the pandas backend) with:
+#
+#     python -m utils.database sqlite:///artifacts/hr.db
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from utils.backends import SQLBackend
+from utils.validation import EMPLOYEE_SCHEMA, REVIEW_SCHEMA
+
+DATABASE_URL_VARIABLE = "HR_DATABASE_URL"
+
+# Table names in the database
+EMPLOYEE_TABLE = "Employee"
+REVIEW_TABLE = "PerformanceRating"
+
+# Open connections kept by the pool (shared by all the sessions of the server)
+POOL_SIZE = 4
+
+# Seconds to wait for a free connection before giving up
+POOL_TIMEOUT = 30
+
+# Rows fetched per round trip
+FETCH_ROWS = 10_000
+
+# Date columns (stored as text by SQLite, converted back in the exported rows)
+DATE_COLUMNS = [column for column, kind in {**EMPLOYEE_SCHEMA, **REVIEW_SCHEMA}.items() if kind.startswith("%")]
+
+
+def database_url():
+    return os.environ.get(DATABASE_URL_VARIABLE)
+
+
+def sqlite_path(url):
+
+    if not url.startswith("sqlite:///"):
+        raise ValueError(f"Unsupported database URL: {url} (expected sqlite:///path/to/file.db)")
+    return url[len("sqlite:///"):]
+
+
+def connect_sqlite(path):
+
+    # Connections move between the script threads of the sessions, so they must not be bound to one thread.
+    # The dashboard only reads: the database is opened read-only when the file exists.
+    def connect():
+        if os.path.exists(path):
+            return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        return sqlite3.connect(path, check_same_thread=False)
+    return connect
+
+
+class ConnectionPool:
+
+    # Fixed-size pool of DB-API connections. Connections are opened on first use and reused afterwards;
+    # a connection that raised an error is closed instead of being returned to the pool.
+
+    def __init__(self, connect, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.connect = connect
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+
+        if not self.slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No free database connection after {self.timeout} s")
+        try:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                connection = self.connect()
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            self.idle.put(connection)
+        finally:
+            self.slots.release()
+
+    def close(self):
+
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class DatabaseBackend(SQLBackend):
+
+    name = "SQL database"
+
+    def __init__(self, pool, employee_table=EMPLOYEE_TABLE, review_table=REVIEW_TABLE, placeholder="?"):
+        self.pool = pool
+        self.placeholder = placeholder
+        self.employees = f'"{employee_table}"'
+        self.reviews = f'"{review_table}"'
+        self.employee_columns = self.query(f"SELECT * FROM {self.employees} WHERE 1 = 0").columns.tolist()
+        self.review_columns = self.query(f"SELECT * FROM {self.reviews} WHERE 1 = 0").columns.tolist()
+        self.columns = list(dict.fromkeys(self.employee_columns + self.review_columns))
+
+    def query(self, sql, params=None):
+
+        # Fetch the result in batches and append every batch to the columns directly (no list of row tuples)
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.arraysize = FETCH_ROWS
+                cursor.execute(sql, params or [])
+                names = [description[0] for description in cursor.description]
+                columns = [[] for _ in names]
+                while True:
+                    batch = cursor.fetchmany(FETCH_ROWS)
+                    if not batch:
+                        break
+                    for column, values in zip(columns, zip(*batch)):
+                        column.extend(values)
+            finally:
+                cursor.close()
+        return pd.DataFrame(dict(zip(names, columns)), columns=names)
+
+    def iter_query(self, sql, params=None, chunk_rows=FETCH_ROWS):
+
+        # One frame per fetched batch: the connection stays out of the pool until the last batch is read
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.arraysize = chunk_rows
+                cursor.execute(sql, params or [])
+                names = [description[0] for description in cursor.description]
+                while True:
+                    batch = cursor.fetchmany(chunk_rows)
+                    if not batch:
+                        break
+                    yield pd.DataFrame.from_records(batch, columns=names)
+            finally:
+                cursor.close()
+
+    def dates(self, df):
+        for column in df.columns:
+            if column in DATE_COLUMNS:
+                df[column] = pd.to_datetime(df[column])
+        return df
+
+    def rows(self, filters=None, columns=None, distinct=False):
+        return self.dates(super().rows(filters, columns, distinct))
+
+    def iter_rows(self, filters=None, columns=None, distinct=False, chunk_rows=FETCH_ROWS):
+        for chunk in super().iter_rows(filters, columns, distinct, chunk_rows):
+            yield self.dates(chunk)
+
+
+def write_sqlite(employees, reviews, path, employee_table=EMPLOYEE_TABLE, review_table=REVIEW_TABLE):
+
+    # Local SQLite copy of the cleaned tables, indexed on EmployeeID and the filter columns of the pages
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with sqlite3.connect(path) as connection:
+        employees.to_sql(employee_table, connection, if_exists="replace", index=False, chunksize=FETCH_ROWS)
+        reviews.to_sql(review_table, connection, if_exists="replace", index=False, chunksize=FETCH_ROWS)
+        connection.execute(f'CREATE UNIQUE INDEX "{employee_table}_EmployeeID" ON "{employee_table}" (EmployeeID)')
+        connection.execute(f'CREATE INDEX "{review_table}_EmployeeID" ON "{review_table}" (EmployeeID, ManagerRating)')
+        for column in ["Department", "Gender", "State", "Attrition"]:
+            connection.execute(f'CREATE INDEX "{employee_table}_{column}" ON "{employee_table}" ("{column}")')
+    connection.close()
+
+
+if __name__ == "__main__":
+
+    from utils.backends import PandasBackend, page_queries, same_results
+    from utils.data import merge_tables, read_tables
+
+    parser = argparse.ArgumentParser(description="Load the current CSVs into a SQLite database and check it against the pandas backend.")
+    parser.add_argument("url", nargs="?", default="sqlite:///artifacts/hr.db", help="sqlite:///path/to/file.db")
+    args = parser.parse_args()
+
+    path = sqlite_path(args.url)
+    employees, reviews = read_tables()
+    write_sqlite(employees, reviews, path)
+    print(f"{len(employees):,} employees and {len(reviews):,} reviews written to {path}")
+
+    pool = ConnectionPool(connect_sqlite(path))
+    start = time.perf_counter()
+    results = page_queries(DatabaseBackend(pool))
+    print(f"SQL database queries: {time.perf_counter() - start:.2f} s")
+    print(f"Identical results: {same_results(page_queries(PandasBackend(merge_tables(employees, reviews))), results)}")
+    pool.close()
@@ -0,0 +1,140 @@
+# Export helpers for the dashboard pages.
+# The rows are read in chunks (Backend.iter_rows, or slices of a DataFrame) and every chunk is written straight to a
+# temporary file on disk, so neither the whole result nor the whole encoded export is held in memory while the file
+# is written. Column projection is applied per chunk.
+# Streamlit 1.40 cannot serve a download from disk, though: st.download_button reads the finished file into its
+# in-memory media store for the session. The peak memory of an export is therefore the size of the encoded file.
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from utils.backends import CHUNK_ROWS
+
+EXPORT_FORMATS = {"CSV": ".csv", "Parquet": ".parquet"}
+
+
+def iter_chunks(df, columns=None, chunk_rows=CHUNK_ROWS):
+
+    # Yield consecutive row slices of the frame, keeping only the requested columns
+    columns = list(columns) if columns else list(df.columns)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows][columns]
+
+
+def iter_csv_chunks(chunks, columns):
+
+    # Yield the chunks as UTF-8 encoded CSV pieces. Only the first piece carries the header.
+    header = True
+    for chunk in chunks:
+        yield chunk[columns].to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+    # No rows still produces a file with the header row
+    if header:
+        yield pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8")
+
+
+def write_csv(chunks, path, columns):
+
+    with open(path, "wb") as f:
+        for piece in iter_csv_chunks(chunks, columns):
+            f.write(piece)
+
+
+def write_parquet(chunks, path, columns):
+
+    # pyarrow is installed together with streamlit, so we import it only when a Parquet export is requested
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # The schema of the file is fixed by the first row group. A column that is all missing in a chunk gets the null
+    # type, which the later chunks would not fit, so the chunks are held back until every column has had a value
+    # (usually the first chunk already) and the schema takes the first type found for every column.
+    pending, types = [], {}
+    schema = writer = None
+    try:
+        for chunk in chunks:
+            chunk = chunk[columns]
+            if writer is not None:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                continue
+
+            chunk_schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            schema = schema or chunk_schema
+            pending.append(chunk)
+            for field in chunk_schema:
+                if not pa.types.is_null(field.type):
+                    types.setdefault(field.name, field.type)
+            if len(types) == len(columns):
+                schema = typed_schema(schema, types)
+                writer = pq.ParquetWriter(path, schema)
+                for chunk in pending:
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                pending = []
+
+        # The rows ended before every column had a value (the missing ones keep the null type), or there are no rows
+        if writer is None:
+            schema = typed_schema(schema, types) if schema else pa.Schema.from_pandas(pd.DataFrame(columns=columns), preserve_index=False)
+            tables = [pa.Table.from_pandas(chunk, schema=schema, preserve_index=False) for chunk in pending]
+            pq.write_table(pa.concat_tables(tables) if tables else schema.empty_table(), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def typed_schema(schema, types):
+
+    # The schema with the type found for every column that had the null type
+    for name, data_type in types.items():
+        i = schema.get_field_index(name)
+        schema = schema.set(i, schema.field(i).with_type(data_type))
+    return schema
+
+
+def write_export(data, path, file_format="CSV", columns=None, chunk_rows=CHUNK_ROWS):
+
+    # `data` is a DataFrame or an iterable of DataFrame chunks (then `columns` is required)
+    if isinstance(data, pd.DataFrame):
+        columns = list(columns) if columns else list(data.columns)
+        data = iter_chunks(data, columns, chunk_rows)
+    if file_format == "CSV":
+        write_csv(data, path, list(columns))
+    elif file_format == "Parquet":
+        write_parquet(data, path, list(columns))
+    else:
+        raise ValueError(f"Unknown export format: {file_format}")
+
+
+def export_section(data, title, file_name, key, default_columns=None, columns=None):
+
+    # Export widget: choose the columns and the format, then build the file on demand.
+    # The file is only written when the user asks for it, not on every rerun of the page.
+    # `data` is a DataFrame, or a function that returns the chunks of rows for the selected columns (then `columns`
+    # lists the available columns), so a query backend only reads the selected columns and only when they are exported.
+    columns = list(data.columns) if isinstance(data, pd.DataFrame) else list(columns)
+
+    with st.expander(f"Export: {title} ⬇️"):
+        selected = st.multiselect("Columns", columns, default=default_columns or columns, key=f"{key}_columns")
+        file_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key=f"{key}_format")
+        if isinstance(data, pd.DataFrame):
+            st.caption(f"{len(data):,} rows")
+
+        if not selected:
+            st.info("Select at least one column to export.")
+            return
+
+        if st.button("Prepare export", key=f"{key}_prepare"):
+            chunks = data if isinstance(data, pd.DataFrame) else data(selected)
+            suffix = EXPORT_FORMATS[file_format]
+            fd, path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            try:
+                write_export(chunks, path, file_format, selected)
+                with open(path, "rb") as f:
+                    st.download_button("Download", data=f, file_name=f"{file_name}{suffix}",
+                                       mime="text/csv" if file_format == "CSV" else "application/octet-stream",
+                                       key=f"{key}_download")
+            finally:
+                os.remove(path)
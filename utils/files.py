@@ -0,0 +1,54 @@
+# File helpers for the artifacts that the running dashboard reads while they are (re)built.
+import json
+import os
+import tempfile
+
+import joblib
+
+# Permissions of the new files of the process (read once: os.umask can only be read by setting it)
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def atomic_write(path, write):
+
+    # Write to a temporary file in the same folder with write(temporary path), then swap it in with an atomic rename.
+    # Readers (other sessions, other processes) see either the old or the new file, never a half-written one.
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    os.close(fd)
+
+    # mkstemp creates the file for its owner only: give it the permissions of a file created with open()
+    os.chmod(tmp_path, 0o666 & ~UMASK)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_json(data, path, **kwargs):
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, **kwargs)
+    atomic_write(path, write)
+
+
+def save_versioned(obj, path, version, **info):
+
+    # Store an object together with the data version it was built from
+    atomic_write(path, lambda tmp_path: joblib.dump({"version": version, "object": obj, **info}, tmp_path))
+
+
+def load_versioned(path, version, **info):
+
+    # Return the stored object if it was built from the same data version (and settings), None otherwise
+    if not os.path.exists(path):
+        return None
+    artifact = joblib.load(path)
+    if artifact.get("version") != version or any(artifact.get(k) != v for k, v in info.items()):
+        return None
+    return artifact["object"]
@@ -0,0 +1,161 @@
+# Attrition model engines and a training/inference benchmark.
+# Every engine is trained on the same feature pipeline (employee-level features, one-hot encoding, scaling),
+# so the engines can be compared on the same holdout set.
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from utils.files import load_versioned, save_versioned  # noqa: F401 (used by Page 4 and warmup.py)
+
+# Based on our correlation analysis we use the following variables for our model
+categ = ['JobRole', 'OverTime', 'MaritalStatus']
+numer = ['Tenure', 'Age', 'YearsWithCurrManager', 'YearsInMostRecentRole', 'YearsSinceLastPromotion']
+
+# Available model engines. Each entry builds a fresh, untrained estimator.
+ENGINES = {
+    "Logistic Regression": lambda: LogisticRegression(class_weight={0: 1, 1: 1}, random_state=42, max_iter=1000),
+    "Histogram Gradient Boosting": lambda: HistGradientBoostingClassifier(random_state=42),
+    "Linear SGD": lambda: SGDClassifier(loss="log_loss", random_state=42),
+}
+
+DEFAULT_ENGINE = "Logistic Regression"
+
+# Artifacts written by the warm-up step (warmup.py)
+MODEL_PATH = "./artifacts/attrition_model.joblib"
+FEATURES_PATH = "./artifacts/employee_features.joblib"
+
+
+def employee_features(df):
+
+    # Build one row per employee from the merged Employee/PerformanceRating frame.
+    # Tenure (year of the last review - hire year) is derived and checked at ingest, see utils/validation.py.
+    # We do not use YearsAtCompany because it contains mistakes.
+    df = df[['EmployeeID'] + numer + categ].assign(AttritionNumerical=df["Attrition"].map({"Yes": 1, "No": 0}))
+
+    # Grouping our df by EmployeeID and aggregating relevant columns
+    return df.groupby('EmployeeID').agg({
+        'Tenure': 'mean',
+        'Age': 'mean',
+        'YearsWithCurrManager': 'mean',
+        'YearsInMostRecentRole': 'mean',
+        'YearsSinceLastPromotion': 'mean',
+        'AttritionNumerical': 'max',
+        'JobRole': 'last',
+        'OverTime': 'last',
+        'MaritalStatus': 'last',
+    })
+
+
+def encode_features(df_grouped):
+
+    # One-hot encoding for categorical variables and separation of features (X) and target (y)
+    df_encoded = pd.get_dummies(df_grouped[categ + numer + ['AttritionNumerical']], columns=categ)
+
+    # Handle missing data
+    df_encoded = df_encoded.dropna()
+
+    X = df_encoded.drop(columns=['AttritionNumerical'])
+    y = df_encoded['AttritionNumerical']
+    return X, y
+
+
+def split_features(X, y):
+
+    # Training and testing sets (80% train, 20% test)
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def make_model(engine=DEFAULT_ENGINE):
+
+    # Scaler and estimator behind one interface (fit / predict / predict_proba)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown model engine: {engine}")
+    return Pipeline([("scaler", StandardScaler()), ("model", ENGINES[engine]())])
+
+
+def holdout_metrics(model, X_test, y_test):
+
+    # Same classification report and confusion matrix as in our analysis, on the holdout set
+    y_pred = model.predict(X_test)
+    report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
+    matrix = confusion_matrix(y_test, y_pred, labels=[0, 1])
+    return report, matrix
+
+
+def model_size(model):
+
+    # Size of the pickled model on disk (KB)
+    fd, path = tempfile.mkstemp(suffix=".joblib")
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        return os.path.getsize(path) / 1024
+    finally:
+        os.remove(path)
+
+
+def _median_time(func, repeats):
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def benchmark_engines(X, y, engines=None, repeats=20):
+
+    # Train every engine on the same split and measure fit time, inference latency, size and accuracy
+    X_train, X_test, y_train, y_test = split_features(X, y)
+    single_row = X_test.iloc[[0]]
+
+    rows = []
+    reports = {}
+    for engine in engines or ENGINES:
+        model = make_model(engine)
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        single_latency = _median_time(lambda: model.predict_proba(single_row), repeats)
+        batch_latency = _median_time(lambda: model.predict_proba(X_test), repeats)
+
+        report, matrix = holdout_metrics(model, X_test, y_test)
+        reports[engine] = (report, matrix)
+
+        rows.append({
+            "Engine": engine,
+            "Fit Time (s)": fit_time,
+            "Single-row Latency (ms)": 1000 * single_latency,
+            "Batch Latency (ms)": 1000 * batch_latency,
+            "Batch Latency per Row (µs)": 1e6 * batch_latency / len(X_test),
+            "Model Size (KB)": model_size(model),
+            "Accuracy": report["accuracy"],
+            "Precision (Leave)": report["1"]["precision"],
+            "Recall (Leave)": report["1"]["recall"],
+            "F1 (Leave)": report["1"]["f1-score"],
+        })
+
+    return pd.DataFrame(rows), reports
+
+
+if __name__ == "__main__":
+
+    # Run the benchmark from the command line: python -m utils.models
+    from utils.data import read_data
+
+    X, y = encode_features(employee_features(read_data()))
+    results, _ = benchmark_engines(X, y)
+    print(results.to_string(index=False))
@@ -0,0 +1,233 @@
+# Online (incremental) updates of the attrition model.
+# New review batches update the published model with partial_fit on the new employee feature rows only,
+# instead of retraining on the whole history. Every few batches the online model is compared with a full
+# retrain to catch drift. The model is published with an atomic file replace, so the dashboard keeps
+# serving the previous version until the new one is complete.
+# Every applied batch is kept in a batch store, so the full retrains see the whole history: the base CSVs
+# and all the batches applied so far, in order.
+import argparse
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from utils.data import merge_tables
+from utils.files import atomic_write
+from utils.validation import read_csv, validate_tables
+from utils.models import employee_features, encode_features, make_model, holdout_metrics
+
+# Published model artifact used by Page 4
+ARTIFACT_PATH = "./artifacts/online_model.joblib"
+
+# Validated and merged rows of every applied batch (batch_00001.pkl, batch_00002.pkl, ...)
+BATCHES_DIR = "./artifacts/online_batches"
+
+# The online model must be a linear model with partial_fit
+ONLINE_ENGINE = "Linear SGD"
+
+# Compare the online model with a full retrain every CHECK_EVERY batches
+CHECK_EVERY = 5
+
+# Maximum F1 gap (full retrain - online) on the holdout set before the online model is replaced
+MAX_F1_GAP = 0.05
+
+# Share of the new employees of a batch held out for the drift check, and the smallest useful holdout
+HOLDOUT_SHARE = 0.2
+MIN_HOLDOUT = 20
+
+
+def load_merged(employee_path, review_path):
+
+    # Validate, repair and merge an employee/review pair of CSVs the same way the pages do
+    df1, df2, _ = validate_tables(read_csv(employee_path), read_csv(review_path))
+    return merge_tables(df1, df2)
+
+
+def batch_paths(folder=BATCHES_DIR):
+    return sorted(glob.glob(os.path.join(folder, "batch_*.pkl")))
+
+
+def store_batch(rows, folder=BATCHES_DIR):
+
+    # Append the batch to the store (the next number after the stored batches)
+    paths = batch_paths(folder)
+    number = int(os.path.basename(paths[-1])[len("batch_"):-len(".pkl")]) + 1 if paths else 1
+    atomic_write(os.path.join(folder, f"batch_{number:05d}.pkl"), rows.to_pickle)
+
+
+def load_history(employee_path, review_path, folder=BATCHES_DIR):
+
+    # Base CSVs followed by every stored batch in order (the latest rows of an employee come last)
+    batches = [pd.read_pickle(path) for path in batch_paths(folder)]
+    return pd.concat([load_merged(employee_path, review_path)] + batches, ignore_index=True)
+
+
+def align_features(X, columns):
+
+    # New batches may miss some categories (or bring new ones): use the training columns, missing ones as 0
+    return X.reindex(columns=columns, fill_value=0)
+
+
+def bootstrap(X, y):
+
+    # Initial online model trained on the full history
+    model = make_model(ONLINE_ENGINE)
+    model.fit(X, y)
+    return {
+        "model": model,
+        "columns": list(X.columns),
+        "batches": 0,
+        "rows_seen": len(X),
+        "seen_ids": set(X.index),
+        "updated": datetime.now().isoformat(timespec="seconds"),
+        "last_check": None,
+    }
+
+
+def learn(artifact, X, y):
+
+    # Update the scaler statistics and the model weights with these rows only
+    model = artifact["model"]
+    X = align_features(X, artifact["columns"])
+    scaler = model.named_steps["scaler"]
+    scaler.partial_fit(X)
+    model.named_steps["model"].partial_fit(scaler.transform(X), y, classes=np.array([0, 1]))
+    artifact["rows_seen"] += len(X)
+    return artifact
+
+
+def partial_update(artifact, X_new, y_new):
+
+    # Apply a new batch
+    artifact = learn(artifact, X_new, y_new)
+    artifact["batches"] += 1
+    artifact["updated"] = datetime.now().isoformat(timespec="seconds")
+    return artifact
+
+
+def holdout_split(X_new, y_new, seen_ids):
+
+    # Held-out slice of a new batch for the drift check: HOLDOUT_SHARE of the batch employees that no model has
+    # seen yet (returning employees are left out: the online model has learned from their earlier rows).
+    # The holdout is empty when it would be smaller than MIN_HOLDOUT.
+    candidates = X_new.index[~X_new.index.isin(seen_ids)]
+    size = int(len(candidates) * HOLDOUT_SHARE)
+    held_out = X_new.index.isin(np.random.default_rng(42).permutation(candidates)[:size if size >= MIN_HOLDOUT else 0])
+    return X_new[~held_out], X_new[held_out], y_new[~held_out], y_new[held_out]
+
+
+def drift_check(artifact, X_train, y_train, X_test, y_test):
+
+    # Compare the online model with a model retrained on the full history, on rows that neither model was
+    # trained on: the held-out slice of the newest batch (X_test), left out of the retrain as well.
+    # If the online model falls behind by more than MAX_F1_GAP, a model retrained on everything replaces it.
+    X_train = align_features(X_train, artifact["columns"])
+    X_test = align_features(X_test, artifact["columns"])
+
+    retrained = make_model(ONLINE_ENGINE)
+    retrained.fit(X_train, y_train)
+
+    online_report, _ = holdout_metrics(artifact["model"], X_test, y_test)
+    retrained_report, _ = holdout_metrics(retrained, X_test, y_test)
+
+    check = {
+        "batch": artifact["batches"],
+        "holdout": len(X_test),
+        "online_f1": online_report.get("1", {}).get("f1-score", 0.0),
+        "retrained_f1": retrained_report.get("1", {}).get("f1-score", 0.0),
+        "agreement": float((artifact["model"].predict(X_test) == retrained.predict(X_test)).mean()),
+        "replaced": False,
+    }
+
+    if check["retrained_f1"] - check["online_f1"] > MAX_F1_GAP:
+        # Drift: refit on everything and continue the online updates from there
+        X, y = pd.concat([X_train, X_test]), pd.concat([y_train, y_test])
+        artifact["model"] = make_model(ONLINE_ENGINE).fit(X, y)
+        artifact["rows_seen"] = len(X)
+        check["replaced"] = True
+
+    artifact["last_check"] = check
+    return artifact
+
+
+def load_artifact(path=ARTIFACT_PATH):
+
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def publish(artifact, path=ARTIFACT_PATH):
+
+    # Readers see either the old or the new model, never a half-written file
+    atomic_write(path, lambda tmp_path: joblib.dump(artifact, tmp_path))
+
+
+def update(new_employee_path, new_review_path, employee_path="./Data/Employee.csv",
+           review_path="./Data/PerformanceRating.csv", path=ARTIFACT_PATH, check_every=CHECK_EVERY,
+           batches_dir=BATCHES_DIR):
+
+    # Apply one batch of new reviews/departures to the published model.
+    # The history (base CSVs and stored batches) is only read to bootstrap the model and on the drift check batches:
+    # the other batches cost as much as the batch itself.
+    artifact = load_artifact(path)
+    history = None
+
+    if artifact is None:
+        history = load_history(employee_path, review_path, batches_dir)
+        X, y = encode_features(employee_features(history))
+        artifact = bootstrap(X, y)
+    elif "seen_ids" not in artifact:
+        # Artifact published before the seen employees were kept in it
+        artifact["seen_ids"] = set(load_history(employee_path, review_path, batches_dir)["EmployeeID"])
+
+    new_rows = load_merged(new_employee_path, new_review_path)
+    X_new, y_new = encode_features(employee_features(new_rows))
+    batch_ids = set(X_new.index)
+    check = bool(check_every) and len(X_new) > 0 and (artifact["batches"] + 1) % check_every == 0
+
+    # On a check batch, a slice of the new employees is kept out of the update for the comparison
+    X_holdout, y_holdout = X_new.iloc[:0], y_new.iloc[:0]
+    if check:
+        X_new, X_holdout, y_new, y_holdout = holdout_split(X_new, y_new, artifact["seen_ids"])
+    if len(X_new):
+        artifact = partial_update(artifact, X_new, y_new)
+
+    if check and len(X_holdout):
+        # The full history: base CSVs, every earlier batch and the new batch (latest rows per employee win),
+        # without the held-out employees
+        if history is None:
+            history = load_history(employee_path, review_path, batches_dir)
+        full = pd.concat([history, new_rows], ignore_index=True)
+        X, y = encode_features(employee_features(full))
+        train = ~X.index.isin(X_holdout.index)
+        artifact = drift_check(artifact, X[train], y[train], X_holdout, y_holdout)
+        if not artifact["last_check"]["replaced"]:
+            # The held-out rows are learned after the comparison
+            artifact = learn(artifact, X_holdout, y_holdout)
+    elif check:
+        artifact["last_check"] = {"batch": artifact["batches"], "skipped": f"fewer than {MIN_HOLDOUT} new employees to hold out"}
+
+    artifact["seen_ids"] |= batch_ids
+    publish(artifact, path)
+    if len(new_rows):
+        store_batch(new_rows, batches_dir)
+    return artifact
+
+
+if __name__ == "__main__":
+
+    # python -m utils.online new_employees.csv new_reviews.csv
+    parser = argparse.ArgumentParser(description="Update the published attrition model with a new review batch.")
+    parser.add_argument("employees", help="CSV with the employee rows of the batch (Employee.csv format)")
+    parser.add_argument("reviews", help="CSV with the new reviews (PerformanceRating.csv format)")
+    parser.add_argument("--check-every", type=int, default=CHECK_EVERY, help="Compare with a full retrain every N batches (0 = never)")
+    args = parser.parse_args()
+
+    artifact = update(args.employees, args.reviews, check_every=args.check_every)
+    print(f"Published model: batch {artifact['batches']}, {artifact['rows_seen']} rows seen, updated {artifact['updated']}")
+    if artifact["last_check"]:
+        print(f"Last drift check: {artifact['last_check']}")
@@ -0,0 +1,237 @@
+# Approximate distinct employee counts with HyperLogLog sketches.
+# An exact distinct count has to deduplicate every EmployeeID of the (review-level) rows on each query. A sketch
+# keeps a fixed number of small registers per group instead, and 2 sketches merge with an element-wise max, so the
+# sketch of a union of groups is exactly the sketch of the union of their employees.
+#
+# The sketches are precomputed once per data version for every combination of the sidebar filter columns
+# (Department, Gender, State, Attrition) and of the values of the charted column. A filtered headcount, or a
+# breakdown by a column, then merges the sketches of the matching combinations: no row is read.
+#
+# The count is estimated from the histogram of the register values with the improved estimator of O. Ertl, "New
+# cardinality estimation algorithms for HyperLogLog sketches" (2017). Unlike the classic estimator, it has no switch
+# between linear counting and the raw estimate (the classic switch at 2.5 * 4096 = 10,240 is biased around the switch,
+# e.g. only about 1 estimate in 5 within 1.6% at 10,000), so the error bound below holds for every count.
+#
+# Error bound: with 2^12 = 4096 registers per sketch, an estimate is within 1.04 / sqrt(4096) = 1.6% of the exact
+# count in about 2 cases out of 3 (one standard error) and within 3.3% in about 19 cases out of 20. Small counts are
+# closer to exact than that. Merging does not add any error. Check it on sets of known size with:
+#
+#     python -m utils.sketches
+#
+# Headcounts with other filters (e.g. the Page 2 policy thresholds) and all the other queries stay exact.
+import argparse
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils.backends import CHUNK_ROWS, OPERATORS, Backend, as_list, filter_columns
+
+# Bits of the hash used to pick the register (2^PRECISION registers per sketch)
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+
+# Relative standard error of an estimate
+RELATIVE_ERROR = 1.04 / np.sqrt(REGISTERS)
+
+# Columns the sketches are split by (the sidebar filters of Pages 1-3)
+SKETCH_FILTERS = ["Department", "Gender", "State", "Attrition"]
+
+# Charted columns of Pages 1 and 3 (their sketches are built ahead of time by the warm-up step)
+CHART_COLUMNS = ["Gender", "MaritalStatus", "TenureGroup", "Age", "YearsAtCompany", "AgeBracket", "DistanceBracket",
+                 "Education", "OverTime", "JobSatisfaction", "JobRole", "StockOptionLevel"]
+
+# Set sizes of the error bound check (including the 8k-12k range of the classic estimator switch)
+CHECK_SIZES = [100, 1_000, 5_000, 8_000, 9_000, 10_000, 10_500, 11_000, 12_000, 20_000, 50_000]
+
+# Smallest share of the estimates within 1 and 2 standard errors that the check accepts with 200 sets per size
+# (about 68% and 95% are expected)
+CHECK_WITHIN_1 = 0.60
+CHECK_WITHIN_2 = 0.90
+
+
+def hash_ids(ids):
+
+    # 64-bit hash of every id (vectorized, stable between runs)
+    return pd.util.hash_array(np.asarray(ids, dtype=object))
+
+
+def bit_length(values):
+
+    # Number of significant bits of every uint64 value (exact, unlike a float log2)
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        large = values >= (np.uint64(1) << np.uint64(shift))
+        length[large] += shift
+        values[large] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def register_values(hashes):
+
+    # Register of every hash (first PRECISION bits) and its value: position of the first 1 bit in the rest
+    index = (hashes >> np.uint64(64 - PRECISION)).astype(np.intp)
+    rest = hashes & np.uint64((1 << (64 - PRECISION)) - 1)
+    rank = (64 - PRECISION) - bit_length(rest) + 1
+    return index, rank.astype(np.uint8)
+
+
+def build_sketches(codes, ids, n_sketches):
+
+    # One sketch per code: registers[code] is the sketch of the ids with that code
+    registers = np.zeros((n_sketches, REGISTERS), dtype=np.uint8)
+    index, rank = register_values(hash_ids(ids))
+    np.maximum.at(registers, (codes, index), rank)
+    return registers
+
+
+def sigma(x):
+
+    # Correction for the empty registers (x: share of registers equal to 0)
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_old = z
+        z += x * y
+        y += y
+        if z == z_old:
+            return z
+
+
+def tau(x):
+
+    # Correction for the saturated registers (x: share of registers below the maximum value)
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        z_old = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == z_old:
+            return z / 3
+
+
+def estimate(registers):
+
+    # Distinct count estimate of a sketch (or of every sketch of a 2-D array), from the histogram of register values
+    registers = np.asarray(registers)
+    q = 64 - PRECISION
+    counts = [(registers == k).sum(axis=-1) for k in range(q + 2)]
+    z = REGISTERS * np.vectorize(tau, otypes=[float])(1 - counts[q + 1] / REGISTERS)
+    for k in range(q, 0, -1):
+        z = 0.5 * (z + counts[k])
+    z = z + REGISTERS * np.vectorize(sigma, otypes=[float])(counts[0] / REGISTERS)
+    return REGISTERS ** 2 / (2 * math.log(2) * z)
+
+
+def check_error_bound(sizes=CHECK_SIZES, trials=200, seed=42):
+
+    # Share of the estimates within 1 and 2 standard errors (RELATIVE_ERROR) for random id sets of known size
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        ids = pd.Series(rng.integers(0, 2 ** 62, size * trials)).astype(str).radd("E").to_numpy()
+        codes = np.repeat(np.arange(trials), size)
+        errors = estimate(build_sketches(codes, ids, trials)) / size - 1
+        results.append({
+            "Size": size,
+            "Within 1 SE": float((np.abs(errors) <= RELATIVE_ERROR).mean()),
+            "Within 2 SE": float((np.abs(errors) <= 2 * RELATIVE_ERROR).mean()),
+            "Mean Error": float(errors.mean()),
+        })
+    return pd.DataFrame(results)
+
+
+class SketchCube:
+
+    # Sketches of the employees of every combination of the `dimensions` values found in the rows
+
+    def __init__(self, rows, dimensions):
+        self.dimensions = dimensions
+        codes = rows.groupby(dimensions, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+        self.cells = rows[dimensions].assign(code=codes).drop_duplicates("code").sort_values("code").reset_index(drop=True)
+        self.registers = build_sketches(codes, rows["EmployeeID"], len(self.cells))
+
+    def count(self, by, filters):
+
+        cells = self.cells
+        for column, op, value in filters:
+            cells = cells[cells[column].isin(value) if op == "in" else OPERATORS[op](cells[column], value)]
+        if not by:
+            return int(round(float(estimate(self.registers[cells["code"].to_numpy()].max(axis=0, initial=0)))))
+
+        # Merge the sketches of every `by` group
+        cells = cells.dropna(subset=by)
+        groups = cells.groupby(by, observed=True)["code"].agg(list)
+        merged = np.array([self.registers[codes].max(axis=0) for codes in groups], dtype=np.uint8).reshape(-1, REGISTERS)
+        result = groups.index.to_frame(index=False)
+        result["Count"] = np.round(estimate(merged)).astype(np.int64)
+        return result
+
+
+class SketchBackend(Backend):
+
+    # Approximate headcounts on top of another backend. The sketches of a chart column are built from the
+    # distinct (employee, filter columns, chart column) rows of the backend the first time the column is used,
+    # unless they are given (`cubes`, e.g. stored by the warm-up step for the same data version).
+
+    def __init__(self, backend, cubes=None):
+        self.backend = backend
+        self.name = f"{backend.name} (approximate)"
+        self.columns = backend.columns
+        self.cubes = dict(cubes or {})
+
+    def cube(self, by):
+
+        dimensions = SKETCH_FILTERS + [column for column in by if column not in SKETCH_FILTERS]
+        key = tuple(dimensions)
+        if key not in self.cubes:
+            rows = self.backend.rows(columns=["EmployeeID"] + dimensions, distinct=True)
+            self.cubes[key] = SketchCube(rows, dimensions)
+        return self.cubes[key]
+
+    def build(self, columns=CHART_COLUMNS):
+
+        # Sketches of the headcounts without a breakdown and by every column
+        for column in [None] + list(columns):
+            self.cube(as_list(column))
+        return self.cubes
+
+    def headcount(self, by=None, filters=None):
+        by = as_list(by)
+        if not all(column in SKETCH_FILTERS for column in filter_columns(filters)):
+            return self.backend.headcount(by, filters)
+        result = self.cube(by).count(by, filters or [])
+        return self.finish(result, by) if by else result
+
+    def employee_mean(self, column, filters=None):
+        return self.backend.employee_mean(column, filters)
+
+    def rows(self, filters=None, columns=None, distinct=False):
+        return self.backend.rows(filters, columns, distinct)
+
+    def iter_rows(self, filters=None, columns=None, distinct=False, chunk_rows=CHUNK_ROWS):
+        return self.backend.iter_rows(filters, columns, distinct, chunk_rows)
+
+    def values(self, column):
+        return self.backend.values(column)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Check the documented error bound of the sketches on id sets of known size.")
+    parser.add_argument("--trials", type=int, default=200, help="Random id sets per size")
+    args = parser.parse_args()
+
+    results = check_error_bound(trials=args.trials)
+    print(f"Relative standard error: {RELATIVE_ERROR:.2%}")
+    print(results.to_string(index=False))
+    ok = (results["Within 1 SE"] >= CHECK_WITHIN_1).all() and (results["Within 2 SE"] >= CHECK_WITHIN_2).all()
+    print("Error bound holds" if ok else "Error bound does NOT hold")
+    sys.exit(0 if ok else 1)
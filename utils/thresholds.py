@@ -0,0 +1,95 @@
+# Precomputed counts for the Page 2 policy thresholds.
+# An employee is flagged for promotion (or retrenchment) when YearsSinceLastPromotion >= a number of years and the
+# average ManagerRating is >= (or <) a rating, for active employees only. Instead of filtering the rows again for
+# every slider position, the active employees are counted once on a grid of (years since promotion, average rating)
+# and the counts are accumulated from the top: grid[y, r] = employees with years >= y and rating >= the r-th rating.
+# Any pair of thresholds is then one lookup, for the whole company or for every value of a breakdown column.
+import numpy as np
+import pandas as pd
+
+from utils.backends import AVERAGE_RATING, Backend
+
+# Columns the flagged employees are broken down by on Page 2
+BREAKDOWNS = ["JobRole", "Department", "AgeBracket", "Gender", "TenureGroup"]
+
+# Rating thresholds offered by the sliders (ManagerRating is between 1 and 5)
+RATING_MIN = 1.0
+RATING_MAX = 5.0
+RATING_STEP = 0.1
+
+# Policy columns
+YEARS = "YearsSinceLastPromotion"
+ACTIVE = ("Attrition", "==", "No")
+
+
+def policy_filters(years, op, rating):
+
+    # Backend filters of a policy (e.g. for the exports): op is ">=" (promotion) or "<" (retrenchment)
+    return [(YEARS, ">=", years), (AVERAGE_RATING, op, rating), ACTIVE]
+
+
+class ThresholdGrid:
+
+    # Only the counts are kept (no reference to the backend), so the grid can be stored by the warm-up step
+
+    def __init__(self, backend, breakdowns=BREAKDOWNS):
+
+        self.ratings = np.round(np.arange(RATING_MIN, RATING_MAX + RATING_STEP / 2, RATING_STEP), 1)
+
+        # Totals that do not depend on the thresholds
+        self.active = backend.headcount(filters=[ACTIVE])
+        self.totals = {by: backend.headcount(by) for by in breakdowns}
+
+        # Active employees counted by the backend (GROUP BY ... COUNT) per years since promotion and average rating,
+        # and per breakdown value. The ratings are grouped on their exact average, so every employee falls in the same
+        # grid cell as with the backend filters; the tables have one row per distinct combination (a few hundred rows
+        # whatever the number of employees), and no employee row is read.
+        counts = backend.headcount([YEARS, AVERAGE_RATING], [ACTIVE])
+        self.max_years = int(counts[YEARS].max()) if len(counts) else 0
+        self.grid = self.accumulate(np.zeros(len(counts), dtype=np.intp), 1, counts)[0]
+        self.values = {}
+        self.grids = {}
+        for by in breakdowns:
+            counts = backend.headcount([by, YEARS, AVERAGE_RATING], [ACTIVE])
+            codes, values = pd.factorize(counts[by])
+            self.values[by] = values
+            self.grids[by] = self.accumulate(codes, len(values), counts)
+
+    def accumulate(self, codes, n_values, counts):
+
+        # Grid cell of every count: its years, and the number of rating thresholds <= its rating.
+        # grid[v, y, r]: employees of value v with years >= y and rating index >= r (one extra empty row/column)
+        year_index = counts[YEARS].to_numpy().astype(np.intp)
+        rating_index = np.searchsorted(self.ratings, counts[AVERAGE_RATING].to_numpy(dtype=float), side="right")
+        grid = np.zeros((n_values, self.max_years + 2, len(self.ratings) + 2), dtype=np.int64)
+        np.add.at(grid, (codes, year_index, rating_index), counts["Count"].to_numpy())
+        return grid[:, ::-1, ::-1].cumsum(axis=1).cumsum(axis=2)[:, ::-1, ::-1]
+
+    def lookup(self, grid, filters):
+
+        # Counts of a policy, given as the filters of policy_filters
+        (years_column, _, years), (rating_column, op, rating), active = filters
+        if years_column != YEARS or rating_column != AVERAGE_RATING or op not in (">=", "<") or active != ACTIVE:
+            raise ValueError(f"Not a policy of the threshold grid: {filters}")
+        y = min(max(int(np.ceil(years)), 0), self.max_years + 1)
+
+        # Rating threshold on the grid (slider values may be off by a rounding error). Any other rating would need
+        # the rows: rounding it to the grid would return the count of another policy.
+        r = int(np.argmin(np.abs(self.ratings - rating)))
+        if not np.isclose(self.ratings[r], rating, rtol=0, atol=1e-9):
+            raise ValueError(f"Rating threshold {rating} is not on the grid ({RATING_MIN} to {RATING_MAX} by {RATING_STEP})")
+        r += 1
+        at_least = grid[..., y, r]
+        return at_least if op == ">=" else grid[..., y, 0] - at_least
+
+    def headcount(self, by=None, filters=None):
+
+        # Same output as Backend.headcount for a policy, without reading any row
+        if by is None:
+            return int(self.lookup(self.grid, filters))
+        counts = self.lookup(self.grids[by], filters)
+        result = pd.DataFrame({by: self.values[by], "Count": counts})
+        return Backend.finish(result[result["Count"] > 0].copy(), [by])
+
+    def total(self, by):
+        return self.totals[by].copy()
@@ -0,0 +1,260 @@
+# Ingest-time validation and repair of the 2 datasets.
+# All checks are vectorized and run once per data version. The cleaned tables are stored as a snapshot together with
+# a quality report, so the pages never repeat the cleanup on a rerun.
+#
+#     python -m utils.validation      (validate the current CSVs and print the quality report)
+import json
+import os
+
+import pandas as pd
+
+from utils.files import atomic_write, write_json
+
+# Expected columns and types. "date" columns carry their exact format, so dates are never parsed by inference.
+EMPLOYEE_SCHEMA = {
+    "EmployeeID": "str",
+    "FirstName": "str",
+    "LastName": "str",
+    "Gender": "str",
+    "Age": "int",
+    "BusinessTravel": "str",
+    "Department": "str",
+    "DistanceFromHome (KM)": "int",
+    "State": "str",
+    "Ethnicity": "str",
+    "Education": "int",
+    "EducationField": "str",
+    "JobRole": "str",
+    "MaritalStatus": "str",
+    "Salary": "int",
+    "StockOptionLevel": "int",
+    "OverTime": "str",
+    "HireDate": "%Y-%m-%d",
+    "Attrition": "str",
+    "YearsAtCompany": "int",
+    "YearsInMostRecentRole": "int",
+    "YearsSinceLastPromotion": "int",
+    "YearsWithCurrManager": "int",
+}
+
+# Columns of the cleaned Employee table (Tenure is derived, see derive_tenure)
+EMPLOYEE_COLUMNS = list(EMPLOYEE_SCHEMA) + ["Tenure"]
+
+REVIEW_SCHEMA = {
+    "PerformanceID": "str",
+    "EmployeeID": "str",
+    "ReviewDate": "%m/%d/%Y",
+    "EnvironmentSatisfaction": "int",
+    "JobSatisfaction": "int",
+    "RelationshipSatisfaction": "int",
+    "TrainingOpportunitiesWithinYear": "int",
+    "TrainingOpportunitiesTaken": "int",
+    "WorkLifeBalance": "int",
+    "SelfRating": "int",
+    "ManagerRating": "int",
+}
+
+# Valid value ranges (inclusive). Values outside the range are set to missing.
+EMPLOYEE_RANGES = {
+    "Age": (16, 100),
+    "DistanceFromHome (KM)": (0, 1000),
+    "Education": (1, 5),
+    "Salary": (0, None),
+    "StockOptionLevel": (0, 3),
+    "YearsAtCompany": (0, 60),
+    "YearsInMostRecentRole": (0, 60),
+    "YearsSinceLastPromotion": (0, 60),
+    "YearsWithCurrManager": (0, 60),
+}
+
+REVIEW_RANGES = {
+    "EnvironmentSatisfaction": (1, 5),
+    "JobSatisfaction": (1, 5),
+    "RelationshipSatisfaction": (1, 5),
+    "TrainingOpportunitiesWithinYear": (0, None),
+    "TrainingOpportunitiesTaken": (0, None),
+    "WorkLifeBalance": (1, 5),
+    "SelfRating": (1, 5),
+    "ManagerRating": (1, 5),
+}
+
+# Allowed values of the Yes/No columns
+FLAG_VALUES = {"OverTime": {"Yes", "No"}, "Attrition": {"Yes", "No"}}
+
+# Cleaned snapshot and quality report
+CLEAN_DIR = "./artifacts/clean"
+CLEAN_EMPLOYEE_PATH = os.path.join(CLEAN_DIR, "Employee.pkl")
+CLEAN_REVIEW_PATH = os.path.join(CLEAN_DIR, "PerformanceRating.pkl")
+REPORT_PATH = os.path.join(CLEAN_DIR, "quality_report.json")
+
+
+class QualityReport:
+
+    # Collects the issues found (and the repair applied) by every check
+    def __init__(self):
+        self.issues = []
+        self.tables = {}
+
+    def add(self, table, column, check, count, action):
+        if count:
+            self.issues.append({"table": table, "column": column, "check": check, "count": int(count), "action": action})
+
+    def to_dict(self, version=None):
+        return {"version": version, "tables": self.tables, "issues": self.issues}
+
+
+def read_csv(path):
+
+    # The CSVs carry a UTF-8 BOM. Everything is read as text first and typed by the schema.
+    return pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False, na_values=[""])
+
+
+def check_schema(df, schema, table, report):
+
+    # Missing columns cannot be repaired. Extra columns are kept.
+    missing = [column for column in schema if column not in df.columns]
+    if missing:
+        raise ValueError(f"{table}: missing columns {missing}")
+    report.add(table, ", ".join(c for c in df.columns if c not in schema), "unexpected columns", len(set(df.columns) - set(schema)), "kept")
+
+
+def apply_types(df, schema, table, report):
+
+    # Strip whitespace from text, convert numbers and parse dates with their exact format
+    for column, kind in schema.items():
+        values = df[column]
+        if kind == "str":
+            stripped = values.str.strip()
+            report.add(table, column, "leading/trailing whitespace", ((stripped != values) & values.notna()).sum(), "stripped")
+            df[column] = stripped
+        elif kind == "int":
+            numbers = pd.to_numeric(values, errors="coerce")
+            report.add(table, column, "not a number", (numbers.isna() & values.notna()).sum(), "set to missing")
+            df[column] = numbers.astype("int64") if numbers.notna().all() else numbers
+        else:
+            dates = pd.to_datetime(values, format=kind, errors="coerce")
+            report.add(table, column, f"not a date in {kind} format", (dates.isna() & values.notna()).sum(), "set to missing")
+            df[column] = dates
+        report.add(table, column, "missing value", df[column].isna().sum(), "kept as missing")
+    return df
+
+
+def check_ranges(df, ranges, table, report):
+
+    for column, (low, high) in ranges.items():
+        values = df[column]
+        invalid = pd.Series(False, index=df.index)
+        if low is not None:
+            invalid |= values < low
+        if high is not None:
+            invalid |= values > high
+        if invalid.any():
+            report.add(table, column, f"outside range [{low}, {high}]", invalid.sum(), "set to missing")
+            df[column] = values.mask(invalid)
+    return df
+
+
+def check_flags(df, table, report):
+
+    for column, allowed in FLAG_VALUES.items():
+        invalid = df[column].notna() & ~df[column].isin(allowed)
+        report.add(table, column, f"not one of {sorted(allowed)}", invalid.sum(), "set to missing")
+        df[column] = df[column].mask(invalid)
+    return df
+
+
+def drop_duplicates(df, key, table, report):
+
+    duplicated = df[key].duplicated()
+    report.add(table, key, "duplicate key", duplicated.sum(), "kept first row")
+    return df[~duplicated]
+
+
+def derive_tenure(employees, reviews, report):
+
+    # Tenure = year of the last review - hire year (our own metric, as YearsAtCompany contains mistakes).
+    # Employees without reviews have no tenure; a last review before the hire year gives no tenure either.
+    last_review = reviews.groupby("EmployeeID")["ReviewDate"].max()
+    tenure = last_review.reindex(employees["EmployeeID"]).dt.year.to_numpy() - employees["HireDate"].dt.year.to_numpy()
+    tenure = pd.Series(tenure, index=employees.index)
+
+    report.add("Employee", "EmployeeID", "no performance reviews", (~employees["EmployeeID"].isin(last_review.index)).sum(), "Tenure missing")
+    negative = tenure < 0
+    report.add("Employee", "Tenure", "last review before the hire year", negative.sum(), "set to missing")
+    employees["Tenure"] = tenure.mask(negative)
+
+    # Consistency of the YearsAtCompany column with the derived tenure
+    known = employees["Tenure"].notna() & employees["YearsAtCompany"].notna()
+    mismatch = known & (employees["Tenure"] != employees["YearsAtCompany"])
+    report.add("Employee", "YearsAtCompany", "differs from derived Tenure", mismatch.sum(), "kept (use Tenure)")
+
+    # Reviews dated before the employee's hire date
+    hire_date = reviews["EmployeeID"].map(employees.set_index("EmployeeID")["HireDate"])
+    report.add("PerformanceRating", "ReviewDate", "before HireDate", (reviews["ReviewDate"] < hire_date).sum(), "kept")
+    return employees
+
+
+def validate_tables(employees, reviews):
+
+    # Validate and repair the raw (text) tables. Returns the cleaned tables and the quality report.
+    report = QualityReport()
+    report.tables = {"Employee": {"rows_in": len(employees)}, "PerformanceRating": {"rows_in": len(reviews)}}
+
+    check_schema(employees, EMPLOYEE_SCHEMA, "Employee", report)
+    check_schema(reviews, REVIEW_SCHEMA, "PerformanceRating", report)
+
+    employees = apply_types(employees.copy(), EMPLOYEE_SCHEMA, "Employee", report)
+    reviews = apply_types(reviews.copy(), REVIEW_SCHEMA, "PerformanceRating", report)
+
+    employees = check_ranges(employees, EMPLOYEE_RANGES, "Employee", report)
+    reviews = check_ranges(reviews, REVIEW_RANGES, "PerformanceRating", report)
+    employees = check_flags(employees, "Employee", report)
+
+    employees = drop_duplicates(employees, "EmployeeID", "Employee", report)
+    reviews = drop_duplicates(reviews, "PerformanceID", "PerformanceRating", report)
+
+    # Referential integrity: every review must belong to a known employee
+    orphan = ~reviews["EmployeeID"].isin(employees["EmployeeID"])
+    report.add("PerformanceRating", "EmployeeID", "not in Employee.EmployeeID", orphan.sum(), "dropped")
+    reviews = reviews[~orphan]
+
+    employees = derive_tenure(employees.reset_index(drop=True), reviews.reset_index(drop=True), report)
+    reviews = reviews.reset_index(drop=True)
+
+    report.tables["Employee"]["rows_out"] = len(employees)
+    report.tables["PerformanceRating"]["rows_out"] = len(reviews)
+    return employees, reviews, report
+
+
+def read_report():
+
+    if not os.path.exists(REPORT_PATH):
+        return None
+    with open(REPORT_PATH) as f:
+        return json.load(f)
+
+
+def load_clean_tables(employee_path, review_path, version):
+
+    # Cleaned tables for this data version: from the snapshot if it exists, otherwise validate and write it
+    report = read_report()
+    if report and report.get("version") == version and os.path.exists(CLEAN_EMPLOYEE_PATH) and os.path.exists(CLEAN_REVIEW_PATH):
+        return pd.read_pickle(CLEAN_EMPLOYEE_PATH), pd.read_pickle(CLEAN_REVIEW_PATH)
+
+    employees, reviews, report = validate_tables(read_csv(employee_path), read_csv(review_path))
+
+    # Every file is swapped in complete, so other sessions validating at the same time never read a partial file.
+    # The report is written last: it marks the snapshot as complete for this version
+    atomic_write(CLEAN_EMPLOYEE_PATH, employees.to_pickle)
+    atomic_write(CLEAN_REVIEW_PATH, reviews.to_pickle)
+    write_json(report.to_dict(version), REPORT_PATH, indent=2)
+    return employees, reviews
+
+
+if __name__ == "__main__":
+
+    from utils.data import EMPLOYEE_PATH, REVIEW_PATH
+
+    _, _, report = validate_tables(read_csv(EMPLOYEE_PATH), read_csv(REVIEW_PATH))
+    print(json.dumps(report.tables, indent=2))
+    print(pd.DataFrame(report.issues).to_string(index=False) if report.issues else "No issues found.")
@@ -0,0 +1,86 @@
+# Warm-up step: run it before starting the server, so the first visitor does not pay for validating the CSVs,
+# writing the backend files, precomputing the aggregates (Page 2 threshold grid, headcount sketches), building the
+# model features, training the model or resizing the Home page images:
+#
+#     python warmup.py && streamlit run Home.py
+#
+# Use --measure to report the time to first render of every page afterwards.
+import argparse
+import time
+
+from utils.assets import build_assets
+from utils.backends import PandasBackend
+from utils.data import SKETCHES_PATH, THRESHOLD_GRID_PATH, data_version, merge_tables, read_tables, write_parquet, write_snapshot
+from utils.sketches import SketchBackend
+from utils.thresholds import ThresholdGrid
+from utils.models import DEFAULT_ENGINE, FEATURES_PATH, MODEL_PATH, employee_features, encode_features, make_model, save_versioned, split_features
+
+PAGES = ["Home.py", "pages/Page 1.py", "pages/Page 2.py", "pages/Page 3.py", "pages/Page 4.py"]
+
+
+def timed(label, func):
+
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<32}{time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def warm_up():
+
+    version = data_version()
+
+    # Validated and repaired tables (utils/validation.py) and the merged dataset snapshot read by utils/data.py
+    df = timed("Validate and merge dataset", lambda: merge_tables(*read_tables()))
+    timed("Write snapshot", lambda: write_snapshot(df, version))
+
+    # Inputs of the query backends: the snapshot above (pandas) and the Parquet files (DuckDB). The backends
+    # themselves (a frame in memory, a DuckDB connection) are built by the server process.
+    timed("Parquet files", lambda: write_parquet(version))
+
+    # Aggregates of the pages, computed from the data rather than from a backend: the Page 2 threshold grid and the
+    # headcount sketches of the charted columns ("Approximate counts")
+    backend = PandasBackend(df)
+    grid = timed("Threshold grid", lambda: ThresholdGrid(backend))
+    save_versioned(grid, THRESHOLD_GRID_PATH, version)
+    cubes = timed("Headcount sketches", lambda: SketchBackend(backend).build())
+    save_versioned(cubes, SKETCHES_PATH, version)
+
+    # Employee-level features and the default model of Page 4
+    df_grouped = timed("Employee features", lambda: employee_features(df))
+    save_versioned(df_grouped, FEATURES_PATH, version)
+
+    def train():
+        X_train, _, y_train, _ = split_features(*encode_features(df_grouped))
+        return make_model(DEFAULT_ENGINE).fit(X_train, y_train)
+
+    model = timed(f"Model ({DEFAULT_ENGINE})", train)
+    save_versioned(model, MODEL_PATH, version, engine=DEFAULT_ENGINE)
+
+    # Pre-resized, content-hashed Home page images
+    _, failed = timed("Home page images", build_assets)
+    for name, error in failed:
+        print(f"  could not build image '{name}' ({error}); the original file is used if there is one")
+
+
+def measure():
+
+    # Time to first render of every page (a fresh script run, as for a new session)
+    from streamlit.testing.v1 import AppTest
+
+    for page in PAGES:
+        at = AppTest.from_file(page, default_timeout=600)
+        timed(f"First render: {page}", at.run)
+        if at.exception:
+            print(f"  {page} raised: {at.exception[0].value}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Preload the dataset, the aggregates, the model and the Home page images.")
+    parser.add_argument("--measure", action="store_true", help="Report the time to first render of every page")
+    args = parser.parse_args()
+
+    timed("Warm-up total", warm_up)
+    if args.measure:
+        measure()